@@ -1,30 +1,95 @@
 from Model import Model
+from Model.MappedModel import MappedModel
+from Model.JsonStream import write_json_array
 
 from Task import Event
 
-import json
+import os
 
 def get_days_for_month(start_date):
     pass
 
+# raised by a progress callback to stop a long running operation. an import that is stopped is undone,
+# and a file that was being written is removed
+class OperationCancelled(Exception):
+    pass
+
 class Controller():
-    def __init__(self):
-        self.model = Model()
+    # database is the file name of a schedule database to open instead of starting with an empty in-memory schedule
+    def __init__(self, database: str = None):
+        self.model = Model(database)
+        # set by the Viewer while a background operation is using the model. the model is not locked, so the views
+        # must not read it while this is True, the worker thread may be changing it
+        self.operation_running = False
+
+    # switches to the schedule kept in a database file, creating the file if it does not exist
+    def open_database(self, file_name: str):
+        model = Model(file_name)
+        self.model.close()
+        self.model = model
     
     def find_task_by_name(self, name: str):
         return self.model.find_task_by_name(name)
     
-    def export_schedule_to_json_file(self, file_name):
-        schedule_json = self.model.dump_full_schedule_to_json()
-        with open(file_name, 'w') as file:
-            file.write(schedule_json)
+    # progress, if given, is called with the number of tasks written so far
+    def export_schedule_to_json_file(self, file_name, progress=None):
+        try:
+            with open(file_name, 'w') as file:
+                self.model.write_full_schedule_to_json(file, progress)
+        except OperationCancelled:
+            os.remove(file_name)
+            raise
         
-    def import_schedule_from_json_file(self, file_name):
+    # stream=True parses the file incrementally instead of reading it into memory at once, for very large schedules.
+    # progress, if given, is called with the number of tasks imported so far, and only used when streaming
+    def import_schedule_from_json_file(self, file_name, stream=False, progress=None, batch_size=10000):
         with open(file_name, 'r') as file:
+            if stream:
+                self.model.import_schedule_from_json_stream(file, batch_size, progress)
+                return
             contents = file.read()
             self.model.import_schedule_from_json(contents)        
 
-    def write_schedule(self, file_name, start_date, schedule_type):
+    # saves the exact state of the schedule as a binary snapshot, which loads much faster than a JSON export
+    def save_snapshot_file(self, file_name):
+        with open(file_name, 'wb') as file:
+            self.model.write_snapshot(file)
+
+    # replaces the schedule with the one saved in a snapshot file
+    def load_snapshot_file(self, file_name):
+        model = Model()
+        with open(file_name, 'rb') as file:
+            model.load_snapshot(file)
+        self.model.close()
+        self.model = model
+
+    # replaces the schedule with the one saved in a change log, and saves every later change to the log as it is made,
+    # instead of rewriting the whole schedule on each save. the log is created if it does not exist
+    def open_change_log(self, path):
+        model = Model()
+        model.open_change_log(path)
+        self.model.close()
+        self.model = model
+
+    # writes the schedule to a mapped schedule file, for reports that only read a window of it
+    def write_mapped_schedule_file(self, file_name):
+        with open(file_name, 'wb') as file:
+            self.model.write_mapped_schedule(file)
+
+    # replaces the schedule with a read-only view of a mapped schedule file. queries such as write_schedule only read
+    # the part of the file they need, and any change raises ValueError
+    def open_mapped_schedule(self, file_name):
+        model = MappedModel(file_name)
+        self.model.close()
+        self.model = model
+
+    # audits a schedule file without importing it, returning every pair of tasks in it that overlap,
+    # and (anti_task, None) for every anti-task in it that cancels nothing
+    def validate_schedule_file(self, file_name):
+        with open(file_name, 'r') as file:
+            return self.model.validate_schedule_json(file.read())
+
+    def write_schedule(self, file_name, start_date, schedule_type, progress=None):
         if schedule_type == 'Day':
             days = 1    
         elif schedule_type == 'Week':
@@ -32,15 +97,39 @@ class Controller():
         else:
             days = 30# johnathans_function(start_date)
 
-        events = self.model.get_events_within_timeframe(start_date, days)
+        # events are expanded and written one at a time, so memory use does not grow with the size of the schedule
+        events = self.model.iter_events_within_timeframe(start_date, days)
 
-        json_str = json.dumps([event.to_dict() for event in events], indent=2)
-        with open(file_name, 'w') as file:
-            file.write(json_str)
+        try:
+            with open(file_name, 'w') as file:
+                write_json_array(file, (event.to_dict() for event in events), progress)
+        except OperationCancelled:
+            os.remove(file_name)
+            raise
 
             
 
     def get_events_within_timeframe(self, start_date: int, days: int) -> list[Event]:
         return self.model.get_events_within_timeframe(start_date, days)
 
+    # same events as get_events_within_timeframe, yielded in chronological order as they are needed
+    def iter_events_within_timeframe(self, start_date: int, days: int):
+        return self.model.iter_events_within_timeframe(start_date, days)
+
+    # earliest (date, start time) slots where a task of the given duration fits, used to suggest a time when adding an event
+    def find_free_slots(self, duration: float, start_date: int, days: int, limit: int = None) -> list[tuple[int, float]]:
+        return self.model.find_free_slots(duration, start_date, days, limit)
+
+    # True if anything happens on the date, a single bitmap lookup used by the month view to highlight days
+    def is_day_busy(self, date: int) -> bool:
+        return self.model.is_day_busy(date)
+
+    # cached lookup of a single day's events, used by the calendar views when painting each day
+    def get_events_for_day(self, date: int) -> list[Event]:
+        return self.model.get_events_for_day(date)
+
+    # events for a range of days grouped by integer date, expanded in a single pass
+    def get_events_by_day(self, start_date: int, days: int, progress=None) -> dict[int, list[Event]]:
+        return self.model.get_events_by_day(start_date, days, progress)
+
     pass
\ No newline at end of file
@@ -0,0 +1,100 @@
+import glob
+import json
+import os
+
+# the log is compacted into a new snapshot once it is larger than the snapshot it applies to, and at least this many bytes.
+# a save then costs about as much as the change it records, and the log never takes longer to replay than the snapshot takes to load
+COMPACT_MIN_LOG_BYTES = 1 << 20
+
+
+# Append-only log of the changes made to a schedule, on top of a snapshot of it (see Snapshot.py). Every group of changes the Model
+# commits is appended as one JSON line, so saving after an edit writes only that edit. When the log grows too large it is compacted
+# into a new snapshot. Each compaction starts a new generation of files, path.N.snapshot and path.N.log, and the newest generation
+# with a complete snapshot is the one restored, so a crash at any point leaves either the old or the new generation whole.
+# a line cut short by a crash is dropped when the log is opened
+class ChangeLog:
+    # fsync=False leaves flushing the written changes to disk to the operating system, for speed at the risk of losing the last few
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+
+        generations = [int(file_name[len(path) + 1:-len(".snapshot")]) for file_name in glob.glob(glob.escape(path) + ".*.snapshot")
+                       if file_name[len(path) + 1:-len(".snapshot")].isdigit()]
+        self.generation = max(generations, default=0)
+        self.remove_other_generations()
+
+        snapshot_path = self.get_snapshot_path(self.generation)
+        self.snapshot_size = os.path.getsize(snapshot_path) if os.path.exists(snapshot_path) else 0
+
+        self.changes: list[list[dict]] = []
+        self.log_file = open(self.get_log_path(self.generation), "a+b")
+        self.log_file.seek(0)
+        valid_size = 0
+        for line in self.log_file:
+            if not line.endswith(b"\n"):
+                break  # cut short by a crash while it was being written, so none of its changes were saved
+            try:
+                self.changes.append(json.loads(line))
+            except ValueError:
+                raise ValueError(f"Change log {self.get_log_path(self.generation)} is damaged")
+            valid_size += len(line)
+        self.log_file.truncate(valid_size)
+        self.log_size = valid_size
+
+    def get_snapshot_path(self, generation: int) -> str:
+        return f"{self.path}.{generation}.snapshot"
+
+    def get_log_path(self, generation: int) -> str:
+        return f"{self.path}.{generation}.log"
+
+    # removes the files of every generation but the current one, and any snapshot left half written
+    def remove_other_generations(self):
+        for file_name in glob.glob(glob.escape(self.path) + ".*"):
+            if file_name not in (self.get_snapshot_path(self.generation), self.get_log_path(self.generation)):
+                suffix = file_name[len(self.path) + 1:]
+                if suffix.endswith((".snapshot", ".log", ".snapshot.tmp")) and suffix.split(".")[0].isdigit():
+                    os.remove(file_name)
+
+    # returns the snapshot of the current generation opened for reading, or None if there is none yet
+    def open_snapshot(self):
+        snapshot_path = self.get_snapshot_path(self.generation)
+        return open(snapshot_path, "rb") if os.path.exists(snapshot_path) else None
+
+    # yields the changes logged after the snapshot, in the order they were made
+    def iter_changes(self):
+        for group in self.changes:
+            yield from group
+
+    # appends one group of changes, which is replayed either whole or not at all
+    def append(self, changes: list[dict]):
+        line = (json.dumps(changes, separators=(",", ":")) + "\n").encode("utf-8")
+        self.log_file.write(line)
+        self.log_file.flush()
+        if self.fsync:
+            os.fsync(self.log_file.fileno())
+        self.log_size += len(line)
+        self.changes = []  # only needed while the log is being replayed
+
+    def needs_compaction(self) -> bool:
+        return self.log_size > max(COMPACT_MIN_LOG_BYTES, self.snapshot_size)
+
+    # replaces the snapshot and the log with a new generation whose snapshot holds the whole schedule and whose log is empty.
+    # write_snapshot is called with the binary file to write the snapshot to
+    def compact(self, write_snapshot):
+        generation = self.generation + 1
+        snapshot_path = self.get_snapshot_path(generation)
+        with open(snapshot_path + ".tmp", "wb") as file:
+            write_snapshot(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(snapshot_path + ".tmp", snapshot_path)
+
+        self.log_file.close()
+        self.generation = generation
+        self.snapshot_size = os.path.getsize(snapshot_path)
+        self.log_file = open(self.get_log_path(generation), "a+b")
+        self.log_size = 0
+        self.remove_other_generations()
+
+    def close(self):
+        self.log_file.close()
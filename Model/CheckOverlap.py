@@ -1,6 +1,7 @@
-from datetime import datetime, timedelta
+import heapq
 
 from Task import Task, TransientTask, RecurringTask, AntiTask
+from Task.TimeCore import get_weekday_from_day, MINUTES_PER_DAY
 
 # wrapper function for checking overlap between any two kinds of tasks
 def check_overlap(task1: Task, task2: Task):
@@ -17,13 +18,7 @@ def check_overlap(task1: Task, task2: Task):
 
 # compare two transient tasks and return True if they overlap
 def transient_datetimes_overlap(task1: TransientTask, task2: TransientTask):
-    task1_start = get_datetime_from_datetime(task1.start_date, task1.start_time)
-    task1_end = get_datetime_from_dur(task1_start, task1.duration)
-
-    task2_start = get_datetime_from_datetime(task2.start_date, task2.start_time)
-    task2_end = get_datetime_from_dur(task2_start, task2.duration)
-
-    if task1_end <= task2_start or task1_start >= task2_end:
+    if task1.end_minute <= task2.start_minute or task1.start_minute >= task2.end_minute:
         return False
     else:
         return True
@@ -32,40 +27,16 @@ def transient_datetimes_overlap(task1: TransientTask, task2: TransientTask):
 # compare two recurring tasks and return True if they overlap
 def recurring_tasks_overlap(task1: RecurringTask, task2: RecurringTask):
 
-    # This function contains some of the most repetitive and ugly source code I have
-    # ever written but I may not have the time capacity to do anything about it before
-    # this project is due
-
-    # start datetime & end datetime for the first instance of the task
-    task1_start = get_datetime_from_datetime(task1.start_date, task1.start_time)
-    task1_start_end = get_datetime_from_dur(task1_start, task1.duration)
-    task1_weekday = task1_start.weekday()
-
-    # start datetime & end datetime for the last instance of the task
-    if task1.frequency == 1:
-        task1_end_date = get_datetime_from_datetime(task1.end_date, task1.start_time)
-        task1_end_date_end = get_datetime_from_dur(task1_end_date, task1.duration)
-    elif task1.frequency == 7:
-        task1_end_date = get_datetime_from_datetime(task1.end_date, task1.start_time)
-        
-        # decrement end_date datetime by a day until it's the correct weekday
-        while (task1_end_date.weekday() != task1_weekday):
-            task1_end_date -= timedelta(days=1)
-        task1_end_date_end = get_datetime_from_dur(task1_end_date, task1.duration)
-
-    # same structure as above but for task2
-    task2_start = get_datetime_from_datetime(task2.start_date, task2.start_time)
-    task2_start_end = get_datetime_from_dur(task2_start, task2.duration)
-    task2_weekday = task2_start.weekday()
-
-    if task2.frequency == 1:
-        task2_end_date = get_datetime_from_datetime(task2.end_date, task2.start_time)
-        task2_end_date_end = get_datetime_from_dur(task2_end_date, task2.duration)
-    elif task2.frequency == 7:
-        task2_end_date = get_datetime_from_datetime(task2.end_date, task2.start_time)
-        while (not(task2_end_date.weekday() == task2_weekday)):
-            task2_end_date -= timedelta(days=1)
-        task2_end_date_end = get_datetime_from_dur(task2_end_date, task2.duration)
+    # start & end minute of the first instance of each task, and of the last instance of each task
+    task1_start = task1.start_minute
+    task1_start_end = task1.end_minute
+    task1_end_date = task1.last_start_minute
+    task1_end_date_end = task1.last_end_minute
+
+    task2_start = task2.start_minute
+    task2_start_end = task2.end_minute
+    task2_end_date = task2.last_start_minute
+    task2_end_date_end = task2.last_end_minute
 
     # if their dates never overlap, return False
     if task1_end_date_end <= task2_start or task1_start >= task2_end_date_end:
@@ -74,8 +45,8 @@ def recurring_tasks_overlap(task1: RecurringTask, task2: RecurringTask):
     # handle comparison for daily tasks
     elif task1.frequency == 1 and task2.frequency == 1:
         # assume matching dates to make accounting for tasks that span multiple days easier
-        task1_start_modified = modify_date(task1_start, task2_start)
-        task1_start_end_modified = get_datetime_from_dur(task1_start_modified, task1.duration)
+        task1_start_modified = modify_date(task1, task2)
+        task1_start_end_modified = task1_start_modified + task1.duration_minutes
         # if times never overlap, return False
         if task1_start_end_modified <= task2_start or task1_start_modified >= task2_start_end:
             return False
@@ -83,8 +54,8 @@ def recurring_tasks_overlap(task1: RecurringTask, task2: RecurringTask):
     # handle comparison for weekly tasks
     elif task1.frequency == 7 and task2.frequency == 7:
         # preserve starting weekday of task 1, assume matching week to make accounting for tasks that span multiple days easier
-        task1_start_modified = modify_week(task1_start, task2_start)
-        task1_start_end_modified = get_datetime_from_dur(task1_start_modified, task1.duration)
+        task1_start_modified = modify_week(task1, task2)
+        task1_start_end_modified = task1_start_modified + task1.duration_minutes
         # if times never overlap, return False
         if task1_start_end_modified <= task2_start or task1_start_modified >= task2_start_end:
             return False
@@ -100,8 +71,8 @@ def recurring_tasks_overlap(task1: RecurringTask, task2: RecurringTask):
                 return False
             
         # assume matching dates to make accounting for tasks that span multiple days easier
-        task1_start_modified = modify_date(task1_start, task2_start)
-        task1_start_end_modified = get_datetime_from_dur(task1_start_modified, task1.duration)
+        task1_start_modified = modify_date(task1, task2)
+        task1_start_end_modified = task1_start_modified + task1.duration_minutes
 
         # if times never overlap, return False
         # we do this by checking if they overlap with the same start date, task1 starting the
@@ -109,12 +80,12 @@ def recurring_tasks_overlap(task1: RecurringTask, task2: RecurringTask):
         if task1_start_end_modified <= task2_start or task1_start_modified >= task2_start_end:
 
             # Check if task 1 starts the day before and overlaps task 2
-            task1_start_mod_day_before = task1_start_modified - timedelta(days=1)
-            task1_start_end_mod_day_before = task1_start_end_modified - timedelta(days=1)
+            task1_start_mod_day_before = task1_start_modified - MINUTES_PER_DAY
+            task1_start_end_mod_day_before = task1_start_end_modified - MINUTES_PER_DAY
             if task1_start_end_mod_day_before <= task2_start or task1_start_mod_day_before >= task2_start_end:
                 # Check if task 1 starts the day after and overlaps task 2
-                task1_start_mod_day_after = task1_start_modified + timedelta(days=1)
-                task1_start_end_mod_day_after = task1_start_end_modified + timedelta(days=1)
+                task1_start_mod_day_after = task1_start_modified + MINUTES_PER_DAY
+                task1_start_end_mod_day_after = task1_start_end_modified + MINUTES_PER_DAY
                 if task1_start_end_mod_day_after <= task2_start or task1_start_mod_day_after >= task2_start_end:
                     return False
         
@@ -125,140 +96,112 @@ def recurring_tasks_overlap(task1: RecurringTask, task2: RecurringTask):
 # compare one transient and one recurring task
 def diff_tasks_overlap(rectask: RecurringTask, tratask: TransientTask):
 
-    # start datetime & end datetime for the first instance of the recurring task
-    rec_start = get_datetime_from_datetime(rectask.start_date, rectask.start_time)
-    rec_start_end = get_datetime_from_dur(rec_start, rectask.duration)
-    rec_weekday = rec_start.weekday()
-
-    # start datetime & end datetime for the last instance of the recurring task
-    if rectask.frequency == 1:
-        rec_end_date = get_datetime_from_datetime(rectask.end_date, rectask.start_time)
-        rec_end_date_end = get_datetime_from_dur(rec_end_date, rectask.duration)
-    elif rectask.frequency == 7:
-        rec_end_date = get_datetime_from_datetime(rectask.end_date, rectask.start_time)
-        
-        # decrement end_date datetime by a day until it's the correct weekday
-        while (rec_end_date.weekday() != rec_weekday):
-            rec_end_date -= timedelta(days=1)
-        rec_end_date_end = get_datetime_from_dur(rec_end_date, rectask.duration)
-    
-    # start and end datetimes for transient task
-    tra_start = get_datetime_from_datetime(tratask.start_date, tratask.start_time)
-    tra_end = get_datetime_from_dur(tra_start, tratask.duration)
-    
     # if transient task is outside the range of the recurring task, return False
-    if tra_end <= rec_start or tra_start >= rec_end_date_end:
+    if tratask.end_minute <= rectask.start_minute or tratask.start_minute >= rectask.last_end_minute:
         return False
-    
-    # Check to see if transient task fits BEFORE CONSIDERING ANTI-TASKS
 
-    # assume matching dates to make accounting for tasks that span multiple days easier
-    tra_start_modified = modify_date(tra_start, rec_start)
-    tra_start_end_modified = get_datetime_from_dur(tra_start_modified, tratask.duration)
+    # find the occurrences of the recurring task that the transient task runs into: the first one that ends after the
+    # transient task starts, up to the last one that starts before the transient task ends (never past the final occurrence).
+    # a transient task is shorter than a day, so this is at most two occurrences
+    period = rectask.frequency * MINUTES_PER_DAY
+    first_occurrence = max(0, (tratask.start_minute - rectask.duration_minutes - rectask.start_minute) // period + 1)
+    last_occurrence = min((tratask.end_minute - 1 - rectask.start_minute) // period,
+                          (rectask.last_start_minute - rectask.start_minute) // period)
 
-    # if times never overlap, return False
+    # HANDLE ANTI TASKS: an occurrence only counts as an overlap if no anti-task cancels it
+    for occurrence in range(first_occurrence, last_occurrence + 1):
+        if not rectask.is_cancelled(rectask.start_minute + occurrence * period):
+            return True
 
-    # handle case where transient task ends before a recurring task instance starts
-    if rectask.frequency == 1:
-        if tra_start_end_modified <= rec_start and tra_start_modified >= (rec_start_end - timedelta(days=1)):
-            return False
-        elif tra_start_modified >= rec_start_end and tra_start_end_modified <= (rec_start + timedelta(days=1)):
-            return False
-    # handle case where transient task starts after a recurring task instance ends
-    else:
-        if tra_start_end_modified <= rec_start and tra_start_modified >= (rec_start_end - timedelta(days=7)):
-            return False
-        elif tra_start_modified >= rec_start_end and tra_start_end_modified <= (rec_start + timedelta(days=7)):
-            return False
-    
-    # HANDLE ANTI TASKS for daily recurring task
-    # recursively split the recurring task via. anti-tasks and check to see if there is still overlap
-    for existing_atask in rectask.anti_tasks:
-        atask_start = get_datetime_from_datetime(existing_atask.start_date, existing_atask.start_time)
-        atask_end = get_datetime_from_dur(atask_start, existing_atask.duration)
-
-        if rectask.frequency == 1:
-            new_left_end = atask_end - timedelta(days=1)
-            new_right_start = atask_start + timedelta(days=1)
+    return False
+
+
+# compare two recurring tasks occurrence by occurrence and return True if any two occurrences that are not cancelled overlap.
+# unlike recurring_tasks_overlap this is exact, and works by modular arithmetic instead of stepping through the occurrences:
+# occurrence i of task1 and occurrence j of task2 overlap when their start minutes differ by more than -task1's duration and
+# less than task2's duration. periods are whole days, so that difference is the same modulo a day for every pair, which leaves at
+# most two differences to try. for each, the (i, j) pairs giving it form a line, and only its part inside both tasks is counted
+def recurring_occurrences_overlap(task1: RecurringTask, task2: RecurringTask) -> bool:
+    period1 = task1.frequency * MINUTES_PER_DAY
+    period2 = task2.frequency * MINUTES_PER_DAY
+    count1 = (task1.last_start_minute - task1.start_minute) // period1 + 1
+    count2 = (task2.last_start_minute - task2.start_minute) // period2 + 1
+    start_difference = task1.start_minute - task2.start_minute
+
+    # the first difference above -task1's duration that is possible, then every whole day after it below task2's duration
+    difference = -task1.duration_minutes + 1 + (start_difference + task1.duration_minutes - 1) % MINUTES_PER_DAY
+    while difference < task2.duration_minutes:
+        # i * period1 - j * period2 = steps days
+        steps = (difference - start_difference) // MINUTES_PER_DAY
+        difference += MINUTES_PER_DAY
+
+        # write i = first_i + step_i * t and j = first_j + step_j * t, for the t that keep 0 <= i < count1 and 0 <= j < count2
+        if task1.frequency == task2.frequency:
+            if steps % task1.frequency:
+                continue
+            first_i, step_i, first_j, step_j = steps // task1.frequency, 1, 0, 1
+        elif task1.frequency == 1:
+            first_i, step_i, first_j, step_j = steps, task2.frequency, 0, 1
         else:
-            new_left_end = atask_end - timedelta(days=7)
-            new_right_start = atask_start + timedelta(days=7)
+            first_i, step_i, first_j, step_j = 0, 1, -steps, task1.frequency
+        lowest = max(-(first_i // step_i), -(first_j // step_j))
+        highest = min((count1 - 1 - first_i) // step_i, (count2 - 1 - first_j) // step_j)
+        if lowest > highest:
+            continue
+
+        # each anti-task cancels a single occurrence, so it can only rule out one t
+        if highest - lowest + 1 > len(task1.anti_tasks) + len(task2.anti_tasks):
+            return True
+        for t in range(lowest, highest + 1):
+            if not task1.is_cancelled(task1.start_minute + (first_i + step_i * t) * period1) and \
+               not task2.is_cancelled(task2.start_minute + (first_j + step_j * t) * period2):
+                return True
 
-        new_start_date = int(new_right_start.strftime("%Y%m%d"))
-        new_end_date = int(new_left_end.strftime("%Y%m%d"))
-        
-        # default to ASSUME NO OVERLAP for this recursion to work:
-        # i.e. in the case where only anti-task is the first instance and no left side can be created
-        # and there is no overlap with the right side, that should return false
-        left_overlap = False
-        right_overlap = False
-        
-        # recursively call this function on the left side of the split
-        if new_end_date >= rectask.start_date:
-                # create new RecurringTask object
-                left_rec_task = RecurringTask(rectask.name, rectask.task_type, rectask.start_date, rectask.start_time, rectask.duration, new_end_date, rectask.frequency)
-                # propogate with applicable anti-tasks from parent objects
-                for atask in rectask.anti_tasks:
-                    if atask.start_date <= left_rec_task.end_date:
-                        left_rec_task.add_anti_task(atask)
-                left_overlap = diff_tasks_overlap(left_rec_task, tratask)
-        
-        # recursively call this function on the right side of the split
-        if new_start_date <= rectask.end_date:
-                # create new RecurringTask object
-                right_rec_task = RecurringTask(rectask.name, rectask.task_type, new_start_date, rectask.start_time, rectask.duration, rectask.end_date, rectask.frequency)
-                # propogate with applicable antitasks from parent object
-                for atask in rectask.anti_tasks:
-                    if atask.start_date >= right_rec_task.start_date:
-                        right_rec_task.add_anti_task(atask)
-                right_overlap = diff_tasks_overlap(right_rec_task, tratask)
-
-        # if no overlap with either side of the split, return False
-        if (not left_overlap) and (not right_overlap):
-            return False
-        
-    # default to return True to indicate there is overlap
-    return True
+    return False
 
 
-# output new datetime with time of datetime1 and date of datetime2
-def modify_date(datetime1: datetime, datetime2: datetime):
-    # Extract the time part from datetime1
-    time_part = datetime1.time()
-    
-    # Extract the date part from datetime2
-    date_part = datetime2.date()
-    
-    # Combine date part from datetime2 and time part from datetime1
-    new_datetime = datetime.combine(date_part, time_part)
-    
-    return new_datetime
+# returns every pair of overlapping tasks in a list, not only the first one. the tasks are swept in order of their minute ranges,
+# so only tasks whose ranges intersect are compared. each pair is (earlier task in the list, later task in the list),
+# the same order add_task compares an existing task with a new one. pairs of recurring tasks are compared exactly, with
+# recurring_occurrences_overlap, so the audit also finds the overlaps the check add_task uses for them misses
+def find_overlapping_pairs(tasks: list[Task]) -> list[tuple[Task, Task]]:
+    ranges = sorted((*get_task_minute_range(task), position) for position, task in enumerate(tasks))
+    active = []  # heap of (end, position) for the tasks whose range has not ended yet
+    pairs = []
 
+    for start, end, position in ranges:
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, other_position in active:
+            first, second = min(position, other_position), max(position, other_position)
+            if type(tasks[first]) is RecurringTask and type(tasks[second]) is RecurringTask:
+                overlap = recurring_occurrences_overlap(tasks[first], tasks[second])
+            else:
+                overlap = check_overlap(tasks[first], tasks[second])
+            if overlap:
+                pairs.append((tasks[first], tasks[second]))
+        heapq.heappush(active, (end, position))
 
-# output new datetime with the time and weekday of datetime1 and the date of datetime2
-def modify_week(datetime1, datetime2):
-    # Extract the time part from datetime1
-    time_part = datetime1.time()
-    
-    # Extract the date part from datetime2
-    date_part = datetime2.date()
+    return pairs
 
-    weekday_dif = datetime1.weekday() - datetime2.weekday()
-    
-    # Combine date part from datetime2 and time part from datetime1
-    new_datetime = datetime.combine(date_part, time_part)
-    new_datetime += timedelta(days=weekday_dif)
-    
-    return new_datetime
+
+# returns the start minute of task1's time of day placed on the start date of task2
+def modify_date(task1: Task, task2: Task):
+    return task2.start_day * MINUTES_PER_DAY + (task1.start_minute - task1.start_day * MINUTES_PER_DAY)
 
 
+# returns the start minute of task1's time of day and weekday placed in the start week of task2
+def modify_week(task1: Task, task2: Task):
+    weekday_dif = get_weekday_from_day(task1.start_day) - get_weekday_from_day(task2.start_day)
+    return modify_date(task1, task2) + weekday_dif * MINUTES_PER_DAY
+
 
 # verifies that an anti-task can be applied to an instance of a recurring task
 def can_apply_anti_task(atask: AntiTask, rectask: RecurringTask):
 
-    atask_start = get_datetime_from_date(atask.start_date)
-    rectask_start = get_datetime_from_date(rectask.start_date)
-    rectask_end = get_datetime_from_date(rectask.end_date)
+    atask_start = atask.start_day
+    rectask_start = rectask.start_day
+    rectask_end = rectask.end_day
 
     # handle daily recurring task
     if rectask.frequency == 1:
@@ -268,17 +211,16 @@ def can_apply_anti_task(atask: AntiTask, rectask: RecurringTask):
             if atask.start_time == rectask.start_time and atask.duration == rectask.duration:
 
                 # return False if identical anti-task exists
-                for existing_atask in rectask.anti_tasks:
-                    if existing_atask.start_date == atask.start_date:
-                        return False
+                if rectask.is_cancelled(atask.start_minute):
+                    return False
                     
                 # else return True
                 return True
     
     # handle weekly recurring task
     if rectask.frequency == 7:
-        atask_day = get_day_of_week(atask.start_date)
-        rectask_day = get_day_of_week(rectask.start_date)
+        atask_day = get_weekday_from_day(atask.start_day)
+        rectask_day = get_weekday_from_day(rectask.start_day)
 
         # check if anti-task falls within datetime constraints of recurring task, on the correct weekday
         if atask_day == rectask_day:
@@ -286,9 +228,8 @@ def can_apply_anti_task(atask: AntiTask, rectask: RecurringTask):
                 if atask.start_time == rectask.start_time and atask.duration == rectask.duration:
                     
                     # return False if identical anti-task exists
-                    for existing_atask in rectask.anti_tasks:
-                        if existing_atask.start_date == atask.start_date:
-                            return False
+                    if rectask.is_cancelled(atask.start_minute):
+                        return False
                     
                     # else return True
                     return True
@@ -296,40 +237,10 @@ def can_apply_anti_task(atask: AntiTask, rectask: RecurringTask):
     # default to return False
     return False
 
-# returns datetime object from integer date
-def get_datetime_from_date(date: int):
-    date_str = str(date)   # YYYYMMDD
-    year = int(date_str[0:4])
-    month = int(date_str[4:6])
-    day = int(date_str[6:8])
-    return datetime(year, month, day)
-
-# returns datetime object with time
-def get_datetime_from_datetime(date: int, time: float):
-    hours = int(time)
-    minute_dict = {0.00: 0, 0.25: 15, 0.50: 30, 0.75: 45}
-    minutes = minute_dict[time - hours]
-    date_str = str(date)   # YYYYMMDD
-    year = int(date_str[0:4])
-    month = int(date_str[4:6])
-    day = int(date_str[6:8])
-    return datetime(year, month, day, hour=hours, minute=minutes)
-
-# adds specified duration to existing datetime, returns new datetime
-# can handle negative hours but only positive minutes
-def get_datetime_from_dur(start: datetime, dur: float):
-
-    #convert duration to timedelta object
-    hour_delta = int(dur)
-    minute_dict = {0.00: 0, 0.25: 15, 0.50: 30, 0.75: 45}
-    minute_delta = minute_dict[dur - hour_delta]
-    time_dur = timedelta(hours=hour_delta, minutes=minute_delta)
-
-    # add timedelta to existing datetime
-    return start + time_dur
-
-
-# returns weekday from integer date
-def get_day_of_week(date):
-    date_obj = get_datetime_from_date(date)
-    return date_obj.weekday()
\ No newline at end of file
+
+# returns the [start, end) range in absolute minutes covered by a task.
+# for a recurring task, this runs from the start of its first occurrence to the end of its last one
+def get_task_minute_range(task: Task) -> tuple[int, int]:
+    if type(task) is RecurringTask:
+        return task.start_minute, task.last_end_minute
+    return task.start_minute, task.end_minute
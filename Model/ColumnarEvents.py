@@ -0,0 +1,92 @@
+try:
+    import numpy
+except ImportError:  # numpy is optional, the Model falls back to expanding events one at a time
+    numpy = None
+
+from Task.TimeCore import MINUTES_PER_DAY
+
+# day number of 1970-01-01, the epoch of numpy's datetime64
+EPOCH_DAY = 719163
+
+# cancelled occurrences are keyed by task position * CANCELLATION_STRIDE + start minute.
+# the stride is larger than any absolute minute up to the year 9999
+CANCELLATION_STRIDE = 1 << 33
+
+# row layout of the structured arrays returned for bulk consumers
+EVENT_DTYPE = numpy.dtype([("start_minute", numpy.int64), ("duration_minutes", numpy.int64), ("task", object)]) if numpy is not None else None
+
+
+# returns True if numpy is installed, so the columnar backend can be used
+def columnar_available() -> bool:
+    return numpy is not None
+
+
+# Column arrays of every recurring task in the model, built once and reused by each timeframe query
+# until the schedule changes. Occurrences for a timeframe are found with array arithmetic instead of
+# stepping through each recurring task one occurrence at a time.
+# the tasks are given in the order of the Model's recurring index, which is how its generators break ties between occurrences
+class ColumnarRecurringTasks:
+    def __init__(self, tasks):
+        self.tasks = list(tasks)
+        self.task_array = numpy.empty(len(self.tasks), dtype=object)
+        self.task_array[:] = self.tasks
+
+        self.start_minutes = numpy.fromiter((task.start_minute for task in self.tasks), numpy.int64, len(self.tasks))
+        self.duration_minutes = numpy.fromiter((task.duration_minutes for task in self.tasks), numpy.int64, len(self.tasks))
+        self.periods = numpy.fromiter((task.frequency * MINUTES_PER_DAY for task in self.tasks), numpy.int64, len(self.tasks))
+        self.last_start_minutes = numpy.fromiter((task.last_start_minute for task in self.tasks), numpy.int64, len(self.tasks))
+
+        # sorted keys of every cancelled occurrence
+        self.cancellations = numpy.array(sorted(position * CANCELLATION_STRIDE + minute
+                                                for position, task in enumerate(self.tasks)
+                                                for minute in task.anti_tasks_by_start), dtype=numpy.int64)
+
+    # returns (start minutes, task positions) of every occurrence that overlaps the inclusive range [start_minute, end_minute],
+    # skipping cancelled occurrences. the occurrences are not sorted
+    def occurrences(self, start_minute: int, end_minute: int):
+        # the first occurrence that ends at or after the start of the timeframe, and the last one that starts by its end
+        first = numpy.maximum(0, -((self.start_minutes + self.duration_minutes - start_minute) // self.periods))
+        last = numpy.minimum(self.last_start_minutes, end_minute) - self.start_minutes
+        last = numpy.where(last < 0, -1, last // self.periods)
+        counts = numpy.maximum(0, last - first + 1)
+
+        positions = numpy.repeat(numpy.arange(len(self.tasks)), counts)
+        # occurrence number of each row within its own task
+        offsets = numpy.arange(len(positions)) - numpy.repeat(numpy.cumsum(counts) - counts, counts) + first[positions]
+        starts = self.start_minutes[positions] + offsets * self.periods[positions]
+
+        if len(self.cancellations):
+            keys = positions * CANCELLATION_STRIDE + starts
+            found = numpy.searchsorted(self.cancellations, keys)
+            cancelled = self.cancellations[numpy.minimum(found, len(self.cancellations) - 1)] == keys
+            starts = starts[~cancelled]
+            positions = positions[~cancelled]
+
+        return starts, positions
+
+    # returns a structured array (EVENT_DTYPE) of the occurrences, together with the given transient tasks, in chronological order
+    def event_array(self, start_minute: int, end_minute: int, transient_tasks: list):
+        starts, positions = self.occurrences(start_minute, end_minute)
+
+        events = numpy.empty(len(transient_tasks) + len(starts), dtype=EVENT_DTYPE)
+        events["start_minute"][:len(transient_tasks)] = [task.start_minute for task in transient_tasks]
+        events["duration_minutes"][:len(transient_tasks)] = [task.duration_minutes for task in transient_tasks]
+        events["task"][:len(transient_tasks)] = transient_tasks
+        events["start_minute"][len(transient_tasks):] = starts
+        events["duration_minutes"][len(transient_tasks):] = self.duration_minutes[positions]
+        events["task"][len(transient_tasks):] = self.task_array[positions]
+
+        # the recurring overlap check has gaps, so rows can share a start minute. the rows are already in the order the heap merge of
+        # Model.iter_timed_events breaks such ties in, transient tasks first and then recurring tasks by position, so a stable sort keeps it
+        return events[numpy.argsort(events["start_minute"], kind="stable")]
+
+
+# returns the integer dates (YYYYMMDD) and decimal start times of an array of absolute minutes
+def get_dates_and_times_from_minutes(minutes):
+    days, minutes_of_day = numpy.divmod(minutes, MINUTES_PER_DAY)
+    dates = (days - EPOCH_DAY).astype("datetime64[D]")
+    months = dates.astype("datetime64[M]")
+    years = months.astype("datetime64[Y]").astype(numpy.int64) + 1970
+    month_numbers = months.astype(numpy.int64) % 12 + 1
+    day_numbers = (dates - months).astype(numpy.int64) + 1
+    return years * 10000 + month_numbers * 100 + day_numbers, minutes_of_day / 60
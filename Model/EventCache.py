@@ -0,0 +1,32 @@
+from collections import OrderedDict
+
+
+# Bounded least-recently-used cache of the events on each day, keyed by integer date (YYYYMMDD).
+# The Model clears it whenever the schedule changes, so entries never outlive the tasks they came from.
+class DayEventCache:
+    def __init__(self, max_days: int = 366):
+        self.max_days = max_days
+        self.days: OrderedDict[int, list] = OrderedDict()
+
+    def __contains__(self, date: int):
+        return date in self.days
+
+    def __len__(self):
+        return len(self.days)
+
+    # returns the cached events for a day, or None if the day is not cached
+    def get(self, date: int):
+        events = self.days.get(date)
+        if events is not None:
+            self.days.move_to_end(date)
+        return events
+
+    # caches the events for a day, evicting the least recently used day when full
+    def put(self, date: int, events: list):
+        self.days[date] = events
+        self.days.move_to_end(date)
+        while len(self.days) > self.max_days:
+            self.days.popitem(last=False)
+
+    def clear(self):
+        self.days.clear()
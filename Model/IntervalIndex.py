@@ -0,0 +1,75 @@
+from bisect import bisect_left, bisect_right
+
+
+# Index of half-open [start, end) intervals, in absolute minutes, each pointing at a task.
+# Entries are kept sorted by start, so an overlap query only has to look at the entries
+# that start between (query_start - longest interval) and query_end.
+class IntervalIndex:
+    def __init__(self):
+        self.starts: list[int] = []
+        self.entries: list[tuple] = []  # (start, end, task), in the same order as self.starts
+        self.max_length = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    # add a task covering [start, end)
+    def insert(self, start: int, end: int, task):
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.entries.insert(position, (start, end, task))
+        self.max_length = max(self.max_length, end - start)
+
+    # add many (start, end, task) entries at once, sorting once instead of inserting one at a time
+    def insert_many(self, entries: list[tuple]):
+        if not entries:
+            return
+        self.entries.extend(entries)
+        self.entries.sort(key=lambda entry: entry[0])
+        self.starts = [entry[0] for entry in self.entries]
+        self.max_length = max(self.max_length, max(end - start for start, end, _ in entries))
+
+    # remove a task previously inserted with the given start. returns True if it was found
+    def remove(self, start: int, task) -> bool:
+        position = bisect_left(self.starts, start)
+        while position < len(self.starts) and self.starts[position] == start:
+            if self.entries[position][2] is task:
+                del self.starts[position]
+                del self.entries[position]
+                if not self.entries:
+                    self.max_length = 0
+                return True
+            position += 1
+        return False
+
+    # remove many tasks at once with a single pass over the index
+    def remove_many(self, tasks):
+        task_ids = {id(task) for task in tasks}
+        self.entries = [entry for entry in self.entries if id(entry[2]) not in task_ids]
+        self.starts = [entry[0] for entry in self.entries]
+        if not self.entries:
+            self.max_length = 0
+
+    # returns every task whose interval overlaps [start, end), in start order
+    def overlapping(self, start: int, end: int) -> list:
+        first = bisect_left(self.starts, start - self.max_length)
+        last = bisect_left(self.starts, end)
+        return [task for entry_start, entry_end, task in self.entries[first:last] if entry_end > start]
+
+    # lazily yields the tasks returned by overlapping(). the index must not change while this is being consumed
+    def iter_overlapping(self, start: int, end: int):
+        first = bisect_left(self.starts, start - self.max_length)
+        last = bisect_left(self.starts, end)
+        for position in range(first, last):
+            entry_start, entry_end, task = self.entries[position]
+            if entry_end > start:
+                yield task
+
+    # every task in the index, in start order. tasks with the same start are in the order they were inserted
+    def tasks(self) -> list:
+        return [task for _, _, task in self.entries]
+
+    def clear(self):
+        self.starts.clear()
+        self.entries.clear()
+        self.max_length = 0
@@ -0,0 +1,83 @@
+import json
+
+WHITESPACE = ' \t\n\r'
+
+
+# yields the elements of a top level JSON array one at a time, reading the file in chunks,
+# so only the element being decoded (plus one chunk) is ever held in memory.
+# raises json.JSONDecodeError if the text is not a JSON array
+def iter_json_array(file, chunk_size: int = 1 << 16):
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+
+    # skips whitespace, reading more of the file when needed, and returns the next character ('' at the end of the file)
+    def peek():
+        nonlocal buffer, position, eof
+        while True:
+            while position < len(buffer) and buffer[position] in WHITESPACE:
+                position += 1
+            if position < len(buffer) or eof:
+                return buffer[position] if position < len(buffer) else ''
+            buffer = file.read(chunk_size)
+            position = 0
+            eof = not buffer
+
+    if peek() != '[':
+        raise json.JSONDecodeError("Expecting '['", buffer, position)
+    position += 1
+
+    if peek() == ']':
+        position += 1
+        if peek() != '':
+            raise json.JSONDecodeError("Extra data", buffer, position)
+        return
+
+    while True:
+        peek()
+
+        # decode the next element. a value at the end of the buffer may have been cut off (a number like "12.5" read as "12."),
+        # so it is only accepted once it is followed by ',' or ']', or the file has ended
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+                following = end
+                while following < len(buffer) and buffer[following] in WHITESPACE:
+                    following += 1
+                if eof or (following < len(buffer) and buffer[following] in ',]'):
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+
+        position = end
+        yield value
+
+        separator = peek()
+        position += 1
+        if separator == ']':
+            if peek() != '':
+                raise json.JSONDecodeError("Extra data", buffer, position)
+            return
+        if separator != ',':
+            raise json.JSONDecodeError("Expecting ',' delimiter", buffer, position - 1)
+
+
+# writes the values of an iterable to a file as a JSON array, one element at a time, so the whole array never has to be in memory.
+# the output is formatted the same as json.dumps(list(values), indent=2).
+# progress, if given, is called with the number of values written so far after every progress_step values.
+# the step is small enough that a progress callback which cancels the write is asked often, even on small schedules
+def write_json_array(file, values, progress=None, progress_step: int = 50):
+    first = True
+    for count, value in enumerate(values, 1):
+        file.write('[\n  ' if first else ',\n  ')
+        file.write(json.dumps(value, indent=2).replace('\n', '\n  '))
+        first = False
+        if progress is not None and count % progress_step == 0:
+            progress(count)
+    file.write('[]' if first else '\n]')
@@ -0,0 +1,32 @@
+from collections import ChainMap
+
+from .Model import Model
+from .MappedSchedule import MappedTransientTasks
+
+
+# A read-only Model over a mapped schedule file (see MappedSchedule.py), for reports that only query a window of a large schedule.
+# opening the file reads only its recurring tasks and anti-tasks. a timeframe query binary searches the transient records by start,
+# and only creates tasks and events for the records that fall in the window. every query of Model works the same way on it,
+# so Controller.write_schedule can run against it directly. every change raises ValueError
+class MappedModel(Model):
+    def __init__(self, file_name: str):
+        super().__init__()
+        self.mapped_tasks = MappedTransientTasks(file_name)
+
+        recurring_tasks, anti_tasks = self.mapped_tasks.read_rules()
+        self.recurring_tasks = {task.name: task for task in recurring_tasks}
+        self.anti_tasks = {task.name: task for task in anti_tasks}
+        self.transient_tasks = self.transient_index = self.mapped_tasks
+        self.tasks_by_name = ChainMap({task.name: task for task in [*recurring_tasks, *anti_tasks]}, self.mapped_tasks)
+        self.recurring_index.insert_many([(task.start_minute, task.last_end_minute, task) for task in recurring_tasks])
+        self.occupancy_stale = True
+
+    def refuse_change(self, *arguments, **keywords):
+        raise ValueError("Mapped schedule files are read-only")
+
+    add_task = add_anti_task = bulk_add_tasks = delete_task = edit_task = refuse_change
+    load_snapshot = import_schedule_from_json = import_schedule_from_json_stream = open_change_log = refuse_change
+
+    def close(self):
+        self.mapped_tasks.close()
+        super().close()
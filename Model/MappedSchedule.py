@@ -0,0 +1,140 @@
+import io
+import mmap
+import struct
+from operator import attrgetter
+
+from Task.Task import restore_transient_task
+from Task.TimeCore import MINUTES_PER_DAY
+
+from .Snapshot import write_snapshot, read_snapshot, get_time_flags, FLOAT_START_TIME, FLOAT_DURATION
+
+# Read-only schedule file meant to be memory-mapped, so a query only reads the part of the file it needs. Layout, all little-endian:
+#   header              magic, version, size of the rules section, number of transient records, size of the string blob
+#   rules section       the recurring tasks and anti-tasks, as a snapshot (see Snapshot.py). they are few and read when the file is opened
+#   transient records   one fixed-size record per transient task, sorted by start minute: start minute, end minute, start date,
+#                       the offset and length of its name and of its type in the string blob, then the same flags as a snapshot
+#                       record, saying which of its start time and duration were given as floats
+#   string blob         the UTF-8 names and types of the transient tasks. each type is stored once
+
+MAPPED_MAGIC = b"PSSMMAP\0"
+MAPPED_VERSION = 2
+
+HEADER = struct.Struct("<8sHQQQ")
+RECORD = struct.Struct("<qqIQIQIB")
+START_MINUTE = struct.Struct("<q")
+
+
+# writes the given tasks to a binary file object in the mapped schedule format
+def write_mapped_schedule(file, recurring_tasks, anti_tasks, transient_tasks):
+    rules = io.BytesIO()
+    write_snapshot(rules, recurring_tasks, anti_tasks, [])
+
+    blob = bytearray()
+    types: dict[str, tuple[int, int]] = {}
+    records = []
+    for task in sorted(transient_tasks, key=attrgetter("start_minute")):
+        if task.task_type not in types:
+            encoded_type = task.task_type.encode("utf-8")
+            types[task.task_type] = (len(blob), len(encoded_type))
+            blob += encoded_type
+        name = task.name.encode("utf-8")
+        records.append(RECORD.pack(task.start_minute, task.end_minute, task.start_date, len(blob), len(name), *types[task.task_type], get_time_flags(task)))
+        blob += name
+
+    file.write(HEADER.pack(MAPPED_MAGIC, MAPPED_VERSION, len(rules.getvalue()), len(records), len(blob)))
+    file.write(rules.getvalue())
+    file.write(b"".join(records))
+    file.write(blob)
+
+
+# A mapped schedule file opened for reading. The transient records are searched in place, and a TransientTask is only created
+# for a record a query returns. Used by MappedModel both as its dict of transient tasks and as its interval index over them.
+# tasks are created anew for every query, so the same record can give different objects
+class MappedTransientTasks:
+    def __init__(self, file_name: str):
+        with open(file_name, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, rules_size, self.record_count, blob_size = HEADER.unpack_from(self.data)
+        except struct.error:
+            raise ValueError("File is not a mapped schedule")
+        if magic != MAPPED_MAGIC:
+            raise ValueError("File is not a mapped schedule")
+        if version != MAPPED_VERSION:
+            raise ValueError(f"Unsupported mapped schedule version {version}")
+
+        self.rules_offset = HEADER.size
+        self.records_offset = self.rules_offset + rules_size
+        self.blob_offset = self.records_offset + self.record_count * RECORD.size
+        if self.blob_offset + blob_size != len(self.data):
+            raise ValueError("Mapped schedule is cut short or damaged")
+
+    # returns the recurring tasks and anti-tasks of the rules section, with the anti-tasks attached
+    def read_rules(self) -> tuple[list, list]:
+        recurring_tasks, anti_tasks, _ = read_snapshot(io.BytesIO(self.data[self.rules_offset:self.records_offset]))
+        return recurring_tasks, anti_tasks
+
+    def get_start_minute(self, position: int) -> int:
+        return START_MINUTE.unpack_from(self.data, self.records_offset + position * RECORD.size)[0]
+
+    # returns the position of the first record that starts at or after minute, by binary search
+    def find_first_starting_at(self, minute: int) -> int:
+        low, high = 0, self.record_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.get_start_minute(middle) < minute:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get_string(self, offset: int, length: int) -> str:
+        start = self.blob_offset + offset
+        return str(self.data[start:start + length], "utf-8")
+
+    # creates the task of the record at a position
+    def get_task(self, position: int):
+        start_minute, end_minute, start_date, name_offset, name_length, type_offset, type_length, flags = RECORD.unpack_from(self.data, self.records_offset + position * RECORD.size)
+        return restore_transient_task(self.get_string(name_offset, name_length), self.get_string(type_offset, type_length), start_date, start_minute, end_minute - start_minute,
+                                      flags & FLOAT_START_TIME, flags & FLOAT_DURATION)
+
+    # returns every task whose interval overlaps [start, end), in start order.
+    # no transient task is a day or longer, so the search starts at the records starting in the day before start
+    def overlapping(self, start: int, end: int) -> list:
+        return list(self.iter_overlapping(start, end))
+
+    def iter_overlapping(self, start: int, end: int):
+        for position in range(self.find_first_starting_at(start - MINUTES_PER_DAY + 1), self.record_count):
+            start_minute, end_minute = struct.unpack_from("<qq", self.data, self.records_offset + position * RECORD.size)
+            if start_minute >= end:
+                return
+            if end_minute > start:
+                yield self.get_task(position)
+
+    def __len__(self):
+        return self.record_count
+
+    # every task in start order
+    def values(self):
+        return (self.get_task(position) for position in range(self.record_count))
+
+    # looking a task up by name reads through every record, as the file is only indexed by start
+    def __getitem__(self, name: str):
+        encoded_name = name.encode("utf-8")
+        for position in range(self.record_count):
+            name_offset, name_length = struct.unpack_from("<QI", self.data, self.records_offset + position * RECORD.size + 20)
+            start = self.blob_offset + name_offset
+            if name_length == len(encoded_name) and self.data[start:start + name_length] == encoded_name:
+                return self.get_task(position)
+        raise KeyError(name)
+
+    def __contains__(self, name: str) -> bool:
+        try:
+            self[name]
+            return True
+        except KeyError:
+            return False
+
+    def close(self):
+        self.data.close()
@@ -1,27 +1,117 @@
 import json 
-from datetime import datetime, timedelta
+from itertools import chain, islice
+from operator import itemgetter, attrgetter
+from contextlib import contextmanager
+import heapq
+import io
+import gc
 
 from Task.Task import Task, TransientTask, RecurringTask, AntiTask, Event
-
-
-from .CheckOverlap import check_overlap, can_apply_anti_task, get_datetime_from_date, get_datetime_from_datetime, get_datetime_from_dur, transient_datetimes_overlap
-
-# checks if two ranges overlap. start and end are both inclusive bounds. 
-def do_datetime_ranges_overap(start1: datetime, end1: datetime, start2: datetime, end2: datetime) -> bool:
-    return (start1 <= end2) and (end1 >= start2)
-
-def get_date_and_time_from_datetime(dt):
-    # Extract date components
-    date_int = int(dt.strftime("%Y%m%d"))
-
-    # Calculate time in decimal hours
-    time_float = dt.hour + dt.minute / 60 + dt.second / 3600
-
-    return date_int, time_float
+from Task.TimeCore import get_day_from_date, get_date_from_day, get_date_and_time_from_minute, get_minutes_from_time, MINUTES_PER_DAY
+
+
+from .CheckOverlap import check_overlap, diff_tasks_overlap, can_apply_anti_task, transient_datetimes_overlap, get_task_minute_range, find_overlapping_pairs
+from .IntervalIndex import IntervalIndex
+from .EventCache import DayEventCache
+from .JsonStream import iter_json_array, write_json_array
+from .OccupancyIndex import OccupancyIndex, SLOT_MINUTES, SLOTS_PER_DAY
+from .ColumnarEvents import ColumnarRecurringTasks, columnar_available, get_dates_and_times_from_minutes
+from .SqliteStore import SqliteStore
+from .Snapshot import write_snapshot, read_snapshot
+from .ChangeLog import ChangeLog
+from .MappedSchedule import write_mapped_schedule
+
+# with at least this many recurring tasks, and numpy installed, timeframe queries expand occurrences with array arithmetic
+COLUMNAR_MIN_RECURRING_TASKS = 64
+
+# builds a task from one entry of a schedule JSON file
+def task_from_dict(t: dict) -> Task:
+    if "Frequency" in t:  # if this is a recurring task
+        return RecurringTask(t["Name"], t["Type"], t["StartDate"], t["StartTime"], t["Duration"], t["EndDate"], t["Frequency"])
+    elif t["Type"] == "Cancellation":  # if this is an anti-task
+        return AntiTask(t["Name"], t["Date"], t["StartTime"], t["Duration"])
+    else:  # otherwise, its a transient task
+        return TransientTask(t["Name"], t["Type"], t["Date"], t["StartTime"], t["Duration"])
+
+# returns True if an entry of a schedule JSON file describes a transient task
+def is_transient_task_dict(t: dict) -> bool:
+    return "Frequency" not in t and t["Type"] != "Cancellation"
+
+# yields (start minute, task) for every occurrence of a recurring task that overlaps the inclusive range [start_minute, end_minute], in order
+def iter_occurrences(task: RecurringTask, start_minute: int, end_minute: int):
+    period = task.frequency * MINUTES_PER_DAY
+
+    # jump straight to the first occurrence that ends at or after the start of the timeframe,
+    # so the cost depends on the number of occurrences in the timeframe rather than the age of the task
+    skipped_occurrences = max(0, -((task.start_minute + task.duration_minutes - start_minute) // period))
+    occurrence_start_minute = task.start_minute + skipped_occurrences * period
+
+    # every occurrence from here until the end of the timeframe or the last occurrence of the recurring task happens during the timeframe
+    while occurrence_start_minute <= end_minute and occurrence_start_minute <= task.last_start_minute:
+        # check if theres any anti-task affecting this occurrence. if there are none, then this can be added as an event.
+        # the specifications for the assignment requires that anti-task's start and end corresponds exactly with the recurring task, so this is an adequate check. 
+        if not task.is_cancelled(occurrence_start_minute):
+            yield occurrence_start_minute, task
+
+        occurrence_start_minute += period
+
+# puts the tasks of a collection back in the order of their order keys, without storing them again
+def sort_by_store_order(tasks: dict):
+    ordered_tasks = sorted(tasks.values(), key=attrgetter("store_order"))
+    dict.clear(tasks)
+    dict.update(tasks, ((task.name, task) for task in ordered_tasks))
 
 class Model:
-    def __init__(self):
-        self.tasks: list[Task] = []
+    # database is the file name of a schedule database to keep the tasks in, instead of keeping them all in memory
+    def __init__(self, database: str = None):
+        # tasks are stored by type, each keyed by name in the order they were added
+        self.recurring_tasks: dict[str, RecurringTask] = {}
+        self.transient_tasks: dict[str, TransientTask] = {}
+        self.anti_tasks: dict[str, AntiTask] = {}
+
+        # interval indexes over the absolute minutes covered by each task, so overlap checks
+        # only compare against tasks whose time range can actually collide
+        self.transient_index = IntervalIndex()
+        self.recurring_index = IntervalIndex()
+
+        # every transient, recurring and anti-task in the model by name, used for lookups and duplicate name checks
+        self.tasks_by_name: dict[str, Task] = {}
+
+        # events already expanded for individual days, cleared whenever the schedule changes
+        self.event_cache = DayEventCache()
+
+        # column arrays of the recurring tasks for the numpy backend, built on first use and dropped whenever the schedule changes
+        self.columnar_recurring_tasks: ColumnarRecurringTasks = None
+
+        # busy quarter hours of each day, kept up to date as tasks change. inside a batch, where tasks may overlap for a while,
+        # it is marked stale instead and rebuilt the next time it is used
+        self.occupancy = OccupancyIndex()
+        self.occupancy_stale = False
+
+        # undo entries of the batch in progress (None outside a batch), and the added or edited tasks whose overlap check waits for the end of the batch
+        self.journal: list[tuple] = None
+        self.deferred_checks: list[Task] = []
+
+        # each task gets the next order key as it is stored, and every collection keeps its tasks in key order,
+        # so a failed batch can put the tasks it deleted or edited back in their old places
+        self.next_store_order = 0
+
+        # with a database, the task collections and the transient interval index are replaced by views of its tables.
+        # its recurring tasks are loaded right away, and the occupancy index is rebuilt from its rows on first use
+        self.store: SqliteStore = None
+        if database is not None:
+            self.store = SqliteStore(database)
+            self.recurring_tasks = self.store.recurring_tasks
+            self.anti_tasks = self.store.anti_tasks
+            self.transient_tasks = self.transient_index = self.store.transient_tasks
+            self.tasks_by_name = self.store.tasks_by_name
+            self.next_store_order = self.store.get_next_store_order()
+            self.recurring_index.insert_many([(*get_task_minute_range(task), task) for task in self.recurring_tasks.values()])
+            self.occupancy_stale = True
+
+        # the change log the schedule is saved to as it changes, if one was opened, and the changes not written to it yet
+        self.change_log: ChangeLog = None
+        self.pending_changes: list[dict] = []
 
     # Add any kind of task. Can be Recurring, Transient, or Anti
     def add_task(self, task: Task):
@@ -29,122 +119,449 @@ class Model:
             self.add_anti_task(task)
         else:
             # Attempts to create the task. Returns True if it fits the schedule, or False otherwise
-            for existing_task in self.tasks:
-
-                # raise eror if same name as existing task or anti-task
-                if task.name == existing_task.name:
-                    raise ValueError('Attempted to add task with duplicate name')
-                elif type(existing_task) is RecurringTask:
-                    for atask in existing_task.anti_tasks:
-                        if task.name == atask.name:
-                            raise ValueError('Attempted to add task with duplicate name')
-                        
-                # raise error if overlaps with existing task
-                if check_overlap(existing_task, task):
-                    raise ValueError('Task overlaps an existing task')
 
-            self.tasks.append(task)
+            # raise eror if same name as existing task or anti-task
+            if task.name in self.tasks_by_name:
+                raise ValueError('Attempted to add task with duplicate name')
+
+            # raise error if overlaps with an existing task whose time range intersects this one.
+            # inside a batch the check waits until the batch ends
+            if self.journal is None:
+                start, end = get_task_minute_range(task)
+                # a transient task overlaps exactly when one of its quarter hours is already taken
+                if type(task) is TransientTask:
+                    if not self.get_occupancy().is_free(start, end):
+                        raise ValueError('Task overlaps an existing task')
+                else:
+                    for existing_task in self.find_overlap_candidates(start, end):
+                        if check_overlap(existing_task, task):
+                            raise ValueError('Task overlaps an existing task')
+            else:
+                self.journal.append(("add", task))
+                self.deferred_checks.append(task)
+
+            self.store_task(task)
+            self.log_change("add", task)
+            self.schedule_changed()
         return True
 
+    # all transient and recurring tasks in the model, recurring tasks first
+    @property
+    def tasks(self) -> list[Task]:
+        return [*self.recurring_tasks.values(), *self.transient_tasks.values()]
+
+    # returns the transient and recurring tasks whose time range intersects [start, end), in absolute minutes
+    def find_overlap_candidates(self, start: int, end: int) -> list[Task]:
+        return self.transient_index.overlapping(start, end) + self.recurring_index.overlapping(start, end)
+
+    # stores a transient or recurring task in the collection and interval index matching its type,
+    # and adds it and its anti-tasks to the name index. keep_store_order=True stores them back with the order keys they already have
+    def store_task(self, task: Task, keep_store_order: bool = False):
+        start, end = get_task_minute_range(task)
+        if not keep_store_order:
+            self.assign_store_order(task)
+        self.tasks_by_name[task.name] = task
+        if type(task) is RecurringTask:
+            self.recurring_tasks[task.name] = task
+            self.recurring_index.insert(start, end, task)
+            for atask in task.anti_tasks:
+                if not keep_store_order:
+                    self.assign_store_order(atask)
+                self.anti_tasks[atask.name] = atask
+                self.tasks_by_name[atask.name] = atask
+        else:
+            self.transient_tasks[task.name] = task
+            self.transient_index.insert(start, end, task)
+        self.mark_occupancy(task, True)
+
+    # removes a transient or recurring task, and any anti-tasks it holds, from the collections and indexes
+    def unstore_task(self, task: Task):
+        start, _ = get_task_minute_range(task)
+        del self.tasks_by_name[task.name]
+        if type(task) is RecurringTask:
+            del self.recurring_tasks[task.name]
+            self.recurring_index.remove(start, task)
+            for atask in task.anti_tasks:
+                self.anti_tasks.pop(atask.name, None)
+                self.tasks_by_name.pop(atask.name, None)
+        else:
+            del self.transient_tasks[task.name]
+            self.transient_index.remove(start, task)
+        self.mark_occupancy(task, False)
+
+    # gives a task the next order key. it must be called just before the task is put in its collection
+    def assign_store_order(self, task: Task):
+        task.store_order = self.next_store_order
+        self.next_store_order += 1
+
+    # sets or clears the quarter hours of a task in the occupancy index, or marks the index stale inside a batch
+    def mark_occupancy(self, task: Task, busy: bool):
+        if self.journal is not None:
+            self.occupancy_stale = True
+        elif not self.occupancy_stale:
+            self.occupancy.mark_task(task, busy)
+
+    # clears (busy=False) or sets the quarter hours of the occurrence an anti-task cancels, if its recurring task is in the model
+    def mark_cancelled_occupancy(self, anti_task: AntiTask, busy: bool):
+        rectask = anti_task.task_reference
+        if self.recurring_tasks.get(rectask.name) is not rectask:
+            return
+        if self.journal is not None:
+            self.occupancy_stale = True
+        elif not self.occupancy_stale:
+            self.occupancy.mark(anti_task.start_minute, anti_task.start_minute + rectask.duration_minutes, busy)
+
+    # returns the occupancy index, rebuilding it from every task if it went stale
+    def get_occupancy(self) -> OccupancyIndex:
+        if self.occupancy_stale:
+            self.occupancy.clear()
+            for task in self.recurring_tasks.values():
+                self.occupancy.mark_task(task, True)
+            if self.store is not None:
+                # only the minutes are needed, so the rows are not turned into tasks
+                for start_minute, end_minute in self.store.transient_tasks.iter_minute_ranges():
+                    self.occupancy.mark(start_minute, end_minute, True)
+            else:
+                for task in self.transient_tasks.values():
+                    self.occupancy.mark_task(task, True)
+            self.occupancy_stale = False
+        return self.occupancy
+
     # assign anti_task to first found compatible Recurring Task Object in Model
     # return True on success, LookupError on failure
     def add_anti_task(self, anti_task: AntiTask): 
-        # iterate all tasks for recurring tasks
-        for existing_task in self.tasks:
-            if type(existing_task) is RecurringTask:
-                # if anti-task has a corresponding RecurringTask instance, have them ref each other
-                if can_apply_anti_task(anti_task, existing_task):
-                    existing_task.add_anti_task(anti_task)
-                    anti_task.reference_task(existing_task)
-                    return True
+        # raise error if same name as existing task or anti-task
+        if anti_task.name in self.tasks_by_name:
+            raise ValueError('Attempted to add task with duplicate name')
+
+        # only recurring tasks running during the anti-task can have an occurrence it cancels
+        for existing_task in self.recurring_index.overlapping(anti_task.start_minute, anti_task.end_minute):
+            # if anti-task has a corresponding RecurringTask instance, have them ref each other
+            if can_apply_anti_task(anti_task, existing_task):
+                existing_task.add_anti_task(anti_task)
+                anti_task.reference_task(existing_task)
+                self.assign_store_order(anti_task)
+                self.anti_tasks[anti_task.name] = anti_task
+                self.tasks_by_name[anti_task.name] = anti_task
+                self.mark_cancelled_occupancy(anti_task, False)
+                if self.journal is not None:
+                    self.journal.append(("add_anti", anti_task))
+                self.log_change("add", anti_task)
+                self.schedule_changed()
+                return True
                 
         raise LookupError('Error: AntiTask does not apply to any existing recurring task')
 
 
     # this function will get all the Events that occur from the start_date to the end_date, exclusive. No specific times, just the whole day as a boundary.
     def get_events_within_timeframe(self, start_date: int, days: int) -> list[Event]:
-        result = []
+        if self.use_columnar_events():
+            start_minute = get_day_from_date(start_date) * MINUTES_PER_DAY
+            return [event for _, event in self.get_columnar_timed_events(start_minute, start_minute + days * MINUTES_PER_DAY - 15)]
+        return list(self.iter_events_within_timeframe(start_date, days))
 
-        start_datetime = get_datetime_from_date(start_date)
-        end_datetime = start_datetime + timedelta(days = (days-1), hours = 23, minutes = 45)  # making inclusive end_datetime. this is the last timestamap of the timeframe.
 
-        for task in self.tasks:
-            if type(task) is TransientTask:
-                begin = get_datetime_from_datetime(task.start_date, task.start_time)
-                end = get_datetime_from_dur(begin, task.duration)
+    # lazily yields the same Events as get_events_within_timeframe, in chronological order.
+    # nothing is expanded until it is asked for, so reading only the first few events, or streaming them to a file, stays cheap
+    def iter_events_within_timeframe(self, start_date: int, days: int):
+        start_minute = get_day_from_date(start_date) * MINUTES_PER_DAY
+        end_minute = start_minute + days * MINUTES_PER_DAY - 15  # making inclusive end_minute. this is the last timestamp of the timeframe.
 
-                if do_datetime_ranges_overap(start_datetime, end_datetime, begin, end): # this task happens during the timeframe
-                    result.append(Event(task.start_date, task.start_time, task.duration, task))
-            elif type(task) is RecurringTask:
-                # this is the last occurrence of the recurring task. it is the datetime of the start of that occurrence 
-                last_occurrence_start_datetime = get_datetime_from_datetime(task.end_date, task.start_time)   
-
-                occurrence_start_datetime = get_datetime_from_datetime(task.start_date, task.start_time)
-
-                while occurrence_start_datetime < end_datetime and occurrence_start_datetime <= last_occurrence_start_datetime:
-                    occurrence_end_datetime = get_datetime_from_dur(occurrence_start_datetime, task.duration)
-
-                    # if this occurrence happens during the timeframe
-                    if do_datetime_ranges_overap(start_datetime, end_datetime, occurrence_start_datetime, occurrence_end_datetime):
-                        # check if theres any anti-task affecting this occurrence. if there are none, then this can be added as an event.
-                        # the specifications for the assignment requires that anti-task's start and end corresponds exactly with the recurring task, so this is an adequate check. 
-                        if not any(get_datetime_from_datetime(anti_task.start_date, anti_task.start_time) == occurrence_start_datetime for anti_task in task.anti_tasks):   
-                            occurrence_start_date, occurrence_start_time = get_date_and_time_from_datetime(occurrence_start_datetime)
-                            result.append(Event(occurrence_start_date, occurrence_start_time, task.duration, task))
-                        
-                    occurrence_start_datetime = occurrence_start_datetime + timedelta(days=task.frequency)
-        
-        result.sort(key=lambda event: get_datetime_from_datetime(event.start_date, event.start_time))
+        for _, event in self.iter_timed_events(start_minute, end_minute):
+            yield event
+
+
+    # returns (start minute, Event) pairs for every event that overlaps the inclusive range [start_minute, end_minute], in chronological order
+    def get_timed_events(self, start_minute: int, end_minute: int) -> list[tuple[int, Event]]:
+        if self.use_columnar_events():
+            return self.get_columnar_timed_events(start_minute, end_minute)
+        return list(self.iter_timed_events(start_minute, end_minute))
+
+
+    # lazily yields the pairs returned by get_timed_events. the transient tasks and the occurrences of each recurring task
+    # are each already in start order, so a heap merges them without sorting the whole timeframe
+    def iter_timed_events(self, start_minute: int, end_minute: int):
+        # the interval indexes work on half open ranges, so widen the inclusive range by a minute on each side.
+        # only tasks whose time range overlaps the timeframe are visited
+        transient_occurrences = ((task.start_minute, task) for task in self.transient_index.iter_overlapping(start_minute - 1, end_minute + 1))
+        recurring_occurrences = [iter_occurrences(task, start_minute, end_minute) for task in self.recurring_index.iter_overlapping(start_minute - 1, end_minute + 1)]
+
+        for occurrence_start_minute, task in heapq.merge(transient_occurrences, *recurring_occurrences, key=itemgetter(0)):
+            if type(task) is TransientTask:
+                yield occurrence_start_minute, Event(task.start_date, task.start_time, task.duration, task)
+            else:
+                occurrence_start_date, occurrence_start_time = get_date_and_time_from_minute(occurrence_start_minute)
+                yield occurrence_start_minute, Event(occurrence_start_date, occurrence_start_time, task.duration, task)
+
+
+    # returns True if timeframe queries should use the numpy backend. below the threshold the per-task generators are faster
+    def use_columnar_events(self) -> bool:
+        return columnar_available() and len(self.recurring_tasks) >= COLUMNAR_MIN_RECURRING_TASKS
+
+    # returns the column arrays of the recurring tasks, building them if the schedule changed since the last query.
+    # they are built in recurring index order, so occurrences that start at the same minute come out as iter_timed_events gives them
+    def get_columnar_recurring_tasks(self) -> ColumnarRecurringTasks:
+        if self.journal is not None:
+            return ColumnarRecurringTasks(self.recurring_index.tasks())  # not kept while a batch is changing the schedule
+        if self.columnar_recurring_tasks is None:
+            self.columnar_recurring_tasks = ColumnarRecurringTasks(self.recurring_index.tasks())
+        return self.columnar_recurring_tasks
+
+    # returns the occurrences of every task overlapping the inclusive range [start_minute, end_minute] as a numpy structured array
+    # with start_minute, duration_minutes and task fields, in chronological order. meant for bulk consumers that do not need Event objects
+    def get_event_array(self, start_minute: int, end_minute: int):
+        if not columnar_available():
+            raise ImportError("numpy is required for get_event_array")
+        transient_tasks = self.transient_index.overlapping(start_minute - 1, end_minute + 1)
+        return self.get_columnar_recurring_tasks().event_array(start_minute, end_minute, transient_tasks)
+
+    # same result as get_timed_events, with the recurring occurrences expanded by the numpy backend
+    def get_columnar_timed_events(self, start_minute: int, end_minute: int) -> list[tuple[int, Event]]:
+        events = self.get_event_array(start_minute, end_minute)
+        dates, times = get_dates_and_times_from_minutes(events["start_minute"])
+
+        timed_events = []
+        for minute, task, date, time in zip(events["start_minute"].tolist(), events["task"].tolist(), dates.tolist(), times.tolist()):
+            if type(task) is TransientTask:
+                timed_events.append((minute, Event(task.start_date, task.start_time, task.duration, task)))
+            else:
+                timed_events.append((minute, Event(date, time, task.duration, task)))
+        return timed_events
+
+
+    # returns the Events of every day from start_date to start_date + days, keyed by integer date, from a single pass over the schedule.
+    # each day holds the same events as get_events_within_timeframe(date, 1), so an event that crosses midnight is listed on both days.
+    # progress, if given, is called with the number of days done so far as the pass moves from one day to the next
+    def get_events_by_day(self, start_date: int, days: int, progress=None) -> dict[int, list[Event]]:
+        first_day = get_day_from_date(start_date)
+        dates = [get_date_from_day(day) for day in range(first_day, first_day + days)]
+
+        # serve the whole range from the day cache when every day is already in it
+        if all(date in self.event_cache for date in dates):
+            return {date: self.get_events_for_day(date) for date in dates}
+
+        start_minute = first_day * MINUTES_PER_DAY
+        end_minute = start_minute + days * MINUTES_PER_DAY - 15
+        buckets = [[] for _ in dates]
+
+        # with a progress callback the events are expanded lazily, so a callback that cancels the query stops the expansion too
+        timed_events = self.get_timed_events(start_minute, end_minute) if progress is None else self.iter_timed_events(start_minute, end_minute)
+        days_done = 0
+        for occurrence_start_minute, event in timed_events:
+            # the event belongs to every day from the one it starts on to the one it ends on, limited to the requested range
+            first_bucket = max(occurrence_start_minute // MINUTES_PER_DAY - first_day, 0)
+            if progress is not None and first_bucket > days_done:
+                days_done = first_bucket
+                progress(days_done)
+            last_bucket = min((occurrence_start_minute + event.task.duration_minutes) // MINUTES_PER_DAY - first_day, days - 1)
+            for bucket in range(first_bucket, last_bucket + 1):
+                buckets[bucket].append(event)
+        if progress is not None:
+            progress(days)
+
+        if self.journal is None:
+            for date, events in zip(dates, buckets):
+                self.event_cache.put(date, events)
+
+        return {date: list(events) for date, events in zip(dates, buckets)}
+
+
+    # returns the Events that happen on a single day, memoized until the schedule next changes.
+    # the returned list is a copy, so callers are free to modify it
+    def get_events_for_day(self, date: int) -> list[Event]:
+        events = self.event_cache.get(date)
+        if events is None:
+            events = self.get_events_within_timeframe(date, 1)
+            if self.journal is None:
+                self.event_cache.put(date, events)
+        return list(events)
+
+    # returns (date, start time) of the earliest free slots from start_date to start_date + days where a transient task of the given duration
+    # could be added, at most limit of them, or all of them if limit is None
+    def find_free_slots(self, duration: float, start_date: int, days: int, limit: int = None) -> list[tuple[int, float]]:
+        return list(islice(self.iter_free_slots(duration, start_date, days), limit))
+
+    # yields the free slots in order, on the same quarter hour grid that tasks are validated on.
+    # a slot is free when none of the quarter hours it covers is set in the occupancy bitmaps
+    def iter_free_slots(self, duration: float, start_date: int, days: int):
+        if duration < 0.25 or duration > 23.75:
+            raise ValueError("Duration must be between 0.25 and 23.75")
+        slot_mask = (1 << (get_minutes_from_time(duration) // SLOT_MINUTES)) - 1
+
+        occupancy = self.get_occupancy()
+        first_day = get_day_from_date(start_date)
+        for day in range(first_day, first_day + days):
+            # a slot late in the day can run into the next one, so both days are looked at together
+            busy_slots = occupancy.get_day(day) | occupancy.get_day(day + 1) << SLOTS_PER_DAY
+            date = get_date_from_day(day)
+            for slot in range(SLOTS_PER_DAY):
+                if not (busy_slots >> slot) & slot_mask:
+                    yield date, slot * SLOT_MINUTES / 60
+
+    # returns True if any event falls on the date, the same as get_events_for_day(date) being non-empty, from the occupancy bitmaps alone.
+    # an event that ends exactly at midnight still counts for the next day, so the last slot of the day before is checked too
+    def is_day_busy(self, date: int) -> bool:
+        occupancy = self.get_occupancy()
+        day = get_day_from_date(date)
+        return occupancy.get_day(day) != 0 or (occupancy.get_day(day - 1) >> (SLOTS_PER_DAY - 1)) & 1 == 1
+
+
+    # called by each operation that changes the schedule. the memoized events are dropped right away,
+    # or when the batch ends if a batch is in progress
+    def schedule_changed(self):
+        if self.journal is None:
+            self.invalidate_event_cache()
+            self.commit_changes()
+
+    # writes the changes made so far to the database and the change log, if the model has them. a batch is written once, when it ends
+    def commit_changes(self):
+        if self.store is not None:
+            self.store.commit()
+        if self.change_log is not None and self.pending_changes:
+            self.change_log.append(self.pending_changes)
+            self.pending_changes = []
+            if self.change_log.needs_compaction():
+                self.change_log.compact(self.write_snapshot)
+
+    # closes the database and the change log, if the model has them. the model can not be used afterwards
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+        if self.change_log is not None:
+            self.change_log.close()
+
+    # records a change for the change log, if one is open: ("add", task), ("add_many", tasks), ("delete", name) or ("edit", name, task).
+    # anti-tasks are added with "add" too
+    def log_change(self, operation: str, *arguments):
+        if self.change_log is None:
+            return
+        if operation == "add":
+            self.pending_changes.append({"op": "add", "task": arguments[0].to_dict()})
+        elif operation == "add_many":
+            self.pending_changes.append({"op": "add_many", "tasks": [task.to_dict() for task in arguments[0]]})
+        elif operation == "delete":
+            self.pending_changes.append({"op": "delete", "name": arguments[0]})
+        elif operation == "edit":
+            self.pending_changes.append({"op": "edit", "name": arguments[0], "task": arguments[1].to_dict()})
+
+    # applies a change recorded by log_change, the same way it was made
+    def apply_change(self, change: dict):
+        if change["op"] == "add":
+            self.add_task(task_from_dict(change["task"]))
+        elif change["op"] == "add_many":
+            self.bulk_add_tasks([task_from_dict(t) for t in change["tasks"]])
+        elif change["op"] == "delete":
+            self.delete_task(change["name"])
+        elif change["op"] == "edit":
+            self.edit_task(change["name"], task_from_dict(change["task"]))
+        else:
+            raise ValueError(f'Unknown change {change["op"]} in change log')
+
+    # restores the schedule saved in a change log into an empty model, then saves every later change to it.
+    # the snapshot is loaded and the logged changes are replayed in one batch, so a log that does not replay leaves the model empty
+    def open_change_log(self, path: str, fsync: bool = True):
+        if self.recurring_tasks or self.anti_tasks or len(self.transient_tasks):
+            raise ValueError("A change log can only be opened by an empty schedule")
+        change_log = ChangeLog(path, fsync)
+        try:
+            with self.batch():
+                snapshot = change_log.open_snapshot()
+                if snapshot is not None:
+                    with snapshot:
+                        self.load_snapshot(snapshot)
+                for change in change_log.iter_changes():
+                    self.apply_change(change)
+        except:
+            change_log.close()
+            raise
+        self.change_log = change_log
 
-        return result
+    # drops every memoized day and the columnar copy of the recurring tasks
+    def invalidate_event_cache(self):
+        self.event_cache.clear()
+        self.columnar_recurring_tasks = None
 
     
     # returns recurring or transient task object by name
     def find_task_by_name(self, name: str) -> Task:
-        for task in self.tasks:
-            if task.name == name:
-                return task
-        return None
+        task = self.tasks_by_name.get(name)
+        if type(task) is AntiTask:
+            return None
+        return task
     
 
-    # return list of RecurringTask objects in model
+    # return read-only view of the RecurringTask objects in model
     def get_recurring_tasks(self):
-        rec_list = list()
-        for task in self.tasks:
-            if type(task) is RecurringTask:
-                rec_list.append(task)
-
-        return rec_list
+        return self.recurring_tasks.values()
     
 
-    # return list of TransientTask objects in model
+    # return read-only view of the TransientTask objects in model
     def get_transient_tasks(self): 
-        tra_list = list()
-        for task in self.tasks:
-            if type(task) is TransientTask:
-                tra_list.append(task)
+        return self.transient_tasks.values()
 
-        return tra_list
 
-
-    # return list of AntiTask objects in model
+    # return read-only view of the AntiTask objects in model
     def get_anti_tasks(self):
-        rec_list = self.get_recurring_tasks()
-        at_list = list()
-
-        # iterate through all recurring tasks in model, add their AntiTasks to at_list
-        for task in rec_list:
-            for a_task in task.anti_tasks:
-                at_list.append(a_task)
-
-        return at_list
+        return self.anti_tasks.values()
     
 
     # function that dumps the whole schedule to JSON. in other words, this dumped JSON can be imported later, to restore the exact state of the system.
     def dump_full_schedule_to_json(self) -> str:
-        return json.dumps([task.to_dict() for task in self.tasks], indent=2)
+        buffer = io.StringIO()
+        self.write_full_schedule_to_json(buffer)
+        return buffer.getvalue()
+
+    # writes the same JSON as dump_full_schedule_to_json straight to a file object, one task at a time.
+    # progress, if given, is called with the number of tasks written so far every 50 tasks
+    def write_full_schedule_to_json(self, file, progress=None):
+        write_json_array(file, (task.to_dict() for task in chain(self.recurring_tasks.values(), self.transient_tasks.values())), progress)
     
 
+    # writes the exact state of the model to a binary file object as a snapshot, which load_snapshot restores much faster than a JSON import
+    def write_snapshot(self, file):
+        write_snapshot(file, self.recurring_tasks.values(), self.anti_tasks.values(), self.transient_tasks.values())
+
+    # writes the schedule to a binary file object as a mapped schedule file, which MappedModel opens read-only for windowed queries
+    def write_mapped_schedule(self, file):
+        write_mapped_schedule(file, self.recurring_tasks.values(), self.anti_tasks.values(), self.transient_tasks.values())
+
+    # restores a snapshot written by write_snapshot into an empty model. the snapshot was valid when it was written, so its tasks
+    # are not checked for overlaps again, and the indexes are built in bulk. raises ValueError if the model already has tasks
+    def load_snapshot(self, file):
+        if self.recurring_tasks or self.anti_tasks or len(self.transient_tasks):
+            raise ValueError("A snapshot can only be loaded into an empty schedule")
+
+        # every object created here is kept, so the garbage collector passes set off by creating them only cost time
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            recurring_tasks, anti_tasks, transient_tasks = read_snapshot(file)
+
+            for task in chain(recurring_tasks, anti_tasks):
+                self.tasks_by_name[task.name] = task
+            for task in recurring_tasks:
+                self.assign_store_order(task)
+                self.recurring_tasks[task.name] = task
+            for task in anti_tasks:
+                self.assign_store_order(task)
+                self.anti_tasks[task.name] = task
+            for task in transient_tasks:
+                self.assign_store_order(task)
+                self.transient_tasks[task.name] = task
+                self.tasks_by_name[task.name] = task
+            self.recurring_index.insert_many([(task.start_minute, task.last_end_minute, task) for task in recurring_tasks])
+            self.transient_index.insert_many([(task.start_minute, task.end_minute, task) for task in transient_tasks])
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        self.occupancy_stale = True
+        if self.journal is not None:
+            self.journal.append(("add_many", [*recurring_tasks, *anti_tasks, *transient_tasks]))
+        self.log_change("add_many", [*recurring_tasks, *anti_tasks, *transient_tasks])
+        self.schedule_changed()
+
+
     # imports task list from valid json file
     def import_schedule_from_json(self, json_str: str):
         try:
@@ -154,39 +571,229 @@ class Model:
 
             # task_list is a list of Dictionaries. Each dict stores the attributes of a single task.
             for t in task_dict_list: 
-                if "Frequency" in t:  # if this is a recurring task
-                    tasks_to_add.append(RecurringTask(t["Name"], t["Type"], t["StartDate"], t["StartTime"], t["Duration"], t["EndDate"], t["Frequency"]))
-                elif t["Type"] == "Cancellation":  # if this is an anti-task
-                    tasks_to_add.append(AntiTask(t["Name"], t["Date"], t["StartTime"], t["Duration"]))
-                else:  # otherwise, its a transient task
-                    tasks_to_add.append(TransientTask(t["Name"], t["Type"], t["Date"], t["StartTime"], t["Duration"]))
+                tasks_to_add.append(task_from_dict(t))
         except:
             raise ValueError("JSON is not formatted properly")
         
-        # sort tasks_to_add such that Recurring Tasks are first, AntiTasks are second, and Transient Tasks are last. 
-        tasks_to_add.sort(key=lambda t: [RecurringTask, AntiTask, TransientTask].index(type(t)))
-
-        tasks_backup = self.tasks.copy()
         try:
-            # try and add all the tasks to the model. If it completes, then there were no issues
-            for task in tasks_to_add:
-                self.add_task(task)
+            # validate and add the whole file at once. If it completes, then there were no issues
+            self.bulk_add_tasks(tasks_to_add)
         except: 
-            # if theres an exception, restore the Model back to its previous state, and throw another exception for the calling function.
-            self.tasks = tasks_backup
+            # the model is left in its previous state, throw another exception for the calling function.
             raise ValueError("Tasks Overlap")
+
+
+    # returns every pair of conflicting tasks in a schedule, instead of stopping at the first overlap like add_task.
+    # with no argument the model's own tasks are checked, otherwise a proposed list of tasks is checked on its own.
+    # the proposed anti-tasks cancel occurrences of the proposed recurring tasks while the check runs, and are detached again afterwards.
+    # a proposed anti-task that cancels no occurrence of any proposed recurring task, which an import rejects, is reported as (anti_task, None)
+    def validate_schedule(self, tasks: list[Task] = None) -> list[tuple[Task, Task]]:
+        if tasks is None:
+            return find_overlapping_pairs(self.tasks)
+
+        recurring_by_time: dict[tuple, list[RecurringTask]] = {}
+        for task in tasks:
+            if type(task) is RecurringTask:
+                recurring_by_time.setdefault((task.start_time, task.duration), []).append(task)
+
+        attached_anti_tasks = []
+        unmatched_anti_tasks = []
+        try:
+            for anti_task in tasks:
+                if type(anti_task) is not AntiTask or anti_task.task_reference is not None:
+                    continue
+                rectask = next((task for task in recurring_by_time.get((anti_task.start_time, anti_task.duration), []) if can_apply_anti_task(anti_task, task)), None)
+                if rectask is not None:
+                    rectask.add_anti_task(anti_task)
+                    attached_anti_tasks.append((rectask, anti_task))
+                else:
+                    unmatched_anti_tasks.append((anti_task, None))
+
+            return find_overlapping_pairs([task for task in tasks if type(task) is not AntiTask]) + unmatched_anti_tasks
+        finally:
+            for rectask, anti_task in attached_anti_tasks:
+                rectask.remove_anti_task(anti_task)
+
+
+    # returns every pair of conflicting tasks in a JSON schedule, without importing it
+    def validate_schedule_json(self, json_str: str) -> list[tuple[Task, Task]]:
+        try:
+            tasks = [task_from_dict(t) for t in json.loads(json_str)]
+        except:
+            raise ValueError("JSON is not formatted properly")
+        return self.validate_schedule(tasks)
+
+
+    # imports a schedule from a JSON file object without reading the whole file into memory.
+    # recurring tasks and anti-tasks are read in a first pass, then transient tasks are parsed and validated batch_size at a time,
+    # so every transient task is checked against every recurring task and anti-task, the same as import_schedule_from_json.
+    # the file must be seekable. if anything fails, every task imported so far is removed again before the error is raised.
+    # progress, if given, is called with the number of tasks imported so far after each batch. an exception raised by it stops the import and undoes it
+    def import_schedule_from_json_stream(self, file, batch_size: int = 10000, progress=None):
+        start_position = file.tell()
+
+        try:
+            rule_tasks = [task_from_dict(t) for t in iter_json_array(file) if not is_transient_task_dict(t)]
+        except:
+            raise ValueError("JSON is not formatted properly")
+
+        file.seek(start_position)
+        transient_task_dicts = (t for t in iter_json_array(file) if is_transient_task_dict(t))
+
+        # every batch is journaled, so if a later one fails the whole import is undone
+        with self.batch():
+            try:
+                self.bulk_add_tasks(rule_tasks)
+            except:
+                raise ValueError("Tasks Overlap")
+            imported = len(rule_tasks)
+            if progress is not None:
+                progress(imported)
+
+            while True:
+                try:
+                    tasks = [task_from_dict(t) for t in islice(transient_task_dicts, batch_size)]
+                except:
+                    raise ValueError("JSON is not formatted properly")
+
+                if not tasks:
+                    return
+
+                try:
+                    self.bulk_add_tasks(tasks)
+                except:
+                    raise ValueError("Tasks Overlap")
+                imported += len(tasks)
+                if progress is not None:
+                    progress(imported)
+
+
+    # removes a batch of tasks added by bulk_add_tasks without any overlap or anti-task checks. used to undo a journaled batch
+    def discard_added_tasks(self, tasks: list[Task]):
+        for task in tasks:
+            if type(task) is AntiTask:
+                task.task_reference.remove_anti_task(task)
+                self.mark_cancelled_occupancy(task, True)
+                task.reference_task(None)
+                self.anti_tasks.pop(task.name, None)
+                self.tasks_by_name.pop(task.name, None)
+            elif type(task) is RecurringTask:
+                self.unstore_task(task)
+            else:
+                del self.transient_tasks[task.name]
+                del self.tasks_by_name[task.name]
+                self.mark_occupancy(task, False)
+        self.transient_index.remove_many([task for task in tasks if type(task) is TransientTask])
+
+
+    # validates a whole batch of tasks against each other and the model, then adds all of them at once.
+    # either every task is added, or the model is left unchanged and the error add_task would have raised is raised.
+    # the result is the same as adding the recurring tasks, then the anti-tasks, then the transient tasks one by one, each in the order given
+    def bulk_add_tasks(self, tasks: list[Task]):
+        recurring_tasks = [task for task in tasks if type(task) is RecurringTask]
+        anti_tasks = [task for task in tasks if type(task) is AntiTask]
+        transient_tasks = [task for task in tasks if type(task) is TransientTask]
+
+        # raise error if a name is used twice in the batch, or is already used in the model
+        batch_names = set()
+        for task in tasks:
+            if task.name in batch_names or task.name in self.tasks_by_name:
+                raise ValueError('Attempted to add task with duplicate name')
+            batch_names.add(task.name)
+
+        # recurring tasks are few, so each one is checked against the indexed model and the batch's earlier recurring tasks
+        batch_recurring_index = IntervalIndex()
+        for task in recurring_tasks:
+            start, end = get_task_minute_range(task)
+            for existing_task in self.find_overlap_candidates(start, end) + batch_recurring_index.overlapping(start, end):
+                if check_overlap(existing_task, task):
+                    raise ValueError('Task overlaps an existing task')
+            batch_recurring_index.insert(start, end, task)
+
+        # anti-tasks must match the start time and duration of their recurring task exactly, so look them up by (time, duration)
+        recurring_by_time: dict[tuple, list[RecurringTask]] = {}
+        for task in [*self.recurring_tasks.values(), *recurring_tasks]:
+            recurring_by_time.setdefault((task.start_time, task.duration), []).append(task)
+
+        attached_anti_tasks = []
+        try:
+            for anti_task in anti_tasks:
+                rectask = next((task for task in recurring_by_time.get((anti_task.start_time, anti_task.duration), []) if can_apply_anti_task(anti_task, task)), None)
+                if rectask is None:
+                    raise LookupError('Error: AntiTask does not apply to any existing recurring task')
+                rectask.add_anti_task(anti_task)
+                anti_task.reference_task(rectask)
+                attached_anti_tasks.append(anti_task)
+
+            # sweep the batch's transient tasks in start order. one overlaps an earlier one exactly when it starts before the latest end so far.
+            # the sweep runs over a sorted copy, so the tasks are still stored in the order they were given
+            latest_end = 0
+            for task in sorted(transient_tasks, key=lambda task: task.start_minute):
+                if task.start_minute < latest_end:
+                    raise ValueError('Task overlaps an existing task')
+                latest_end = max(latest_end, task.end_minute)
+
+                # then against the transient tasks in the model, and every recurring task, now that all anti-tasks are attached
+                if self.transient_index.overlapping(task.start_minute, task.end_minute):
+                    raise ValueError('Task overlaps an existing task')
+                for rectask in self.recurring_index.overlapping(task.start_minute, task.end_minute) + batch_recurring_index.overlapping(task.start_minute, task.end_minute):
+                    if diff_tasks_overlap(rectask, task):
+                        raise ValueError('Task overlaps an existing task')
+        except:
+            # detach the anti-tasks again, some of them may belong to recurring tasks that were already in the model
+            for anti_task in attached_anti_tasks:
+                anti_task.task_reference.remove_anti_task(anti_task)
+                anti_task.reference_task(None)
+            raise
+
+        # commit the whole batch. store_task already stores the anti-tasks of the batch's own recurring tasks, leaving out the
+        # occurrences they cancel, so only the anti-tasks of recurring tasks that were in the model before are stored and cleared here
+        batch_recurring_ids = {id(task) for task in recurring_tasks}
+        for task in recurring_tasks:
+            self.store_task(task)
+        for anti_task in anti_tasks:
+            if id(anti_task.task_reference) not in batch_recurring_ids:
+                self.assign_store_order(anti_task)
+                self.anti_tasks[anti_task.name] = anti_task
+                self.tasks_by_name[anti_task.name] = anti_task
+                self.mark_cancelled_occupancy(anti_task, False)
+        for task in transient_tasks:
+            self.assign_store_order(task)
+            self.transient_tasks[task.name] = task
+            self.tasks_by_name[task.name] = task
+            self.mark_occupancy(task, True)
+        self.transient_index.insert_many([(task.start_minute, task.end_minute, task) for task in transient_tasks])
+        if self.journal is not None:
+            self.journal.append(("add_many", [*recurring_tasks, *anti_tasks, *transient_tasks]))
+        self.log_change("add_many", [*recurring_tasks, *anti_tasks, *transient_tasks])
+        self.schedule_changed()
+        return True
         
 
-    # deletes a transient or recurring task object from Model
+    # deletes a transient, recurring or anti-task object from Model
     # return True if successful, otherwise raises LookupError
     def delete_task(self, task_name: str):
-        task = self.find_task_by_name(task_name)
+        task = self.tasks_by_name.get(task_name)
         if task != None:
             # if anti task was in same spot as any transient task (the only case that needs to be checked for anti-task removal)
-            if type(task) is AntiTask and any(transient_datetimes_overlap(transient_task, task) for transient_task in self.get_transient_tasks()): 
+            if type(task) is AntiTask and any(transient_datetimes_overlap(transient_task, task) for transient_task in self.transient_index.overlapping(task.start_minute, task.end_minute)): 
                 raise ValueError("Anti Task is used by existing transient task")
             
-            self.tasks.remove(task)
+            if type(task) is AntiTask:
+                # removing an anti-task restores the occurrence it cancelled on its recurring task
+                if self.journal is not None:
+                    self.journal.append(("delete_anti", task, task.task_reference))
+                task.task_reference.remove_anti_task(task)
+                self.mark_cancelled_occupancy(task, True)
+                task.reference_task(None)
+                del self.anti_tasks[task.name]
+                del self.tasks_by_name[task.name]
+            else:
+                if self.journal is not None:
+                    self.journal.append(("delete", task))
+                self.unstore_task(task)
+            self.log_change("delete", task_name)
+            self.schedule_changed()
             return True
         
         raise LookupError("Task with specified name does not exist in model")
@@ -206,22 +813,133 @@ class Model:
         if not(type(target_task) is type(task)):
             raise TypeError("New task does not match existing type")
         
-        # re-apply any applicable anti-tasks from original task to new one
+        # re-apply any applicable anti-tasks from original task to new one.
+        # the carried anti-tasks are the undo record: nothing else changes until the edited task is known to fit
+        carried_anti_tasks = []
         if type(target_task) is RecurringTask and type(task) is RecurringTask:
             for atask in target_task.anti_tasks:
                 if can_apply_anti_task(atask, task):
                     task.add_anti_task(atask)
                     atask.reference_task(task)
-        
-        # make a backup up the current task list
-        temp_list = self.tasks.copy()  
+                    carried_anti_tasks.append(atask)
 
-        # attempt to delete task and add edited version
+        # check the edited task against its neighbours in the indexes only, leaving out the task it replaces.
+        # inside a batch the overlap check waits until the batch ends
         try:
-            self.delete_task(task_name)
-            self.add_task(task)
-            return True
-        # restore tasklist and raise error if changes fail
+            if task.name != task_name and task.name in self.tasks_by_name:
+                raise ValueError('Attempted to add task with duplicate name')
+
+            if self.journal is None:
+                start, end = get_task_minute_range(task)
+                for existing_task in self.find_overlap_candidates(start, end):
+                    if existing_task is not target_task and check_overlap(existing_task, task):
+                        raise ValueError('Task overlaps an existing task')
+        # undo the carried anti-tasks and raise error if changes fail
         except:
-            self.tasks = temp_list
+            # hand the carried over anti-tasks back to the original task
+            for atask in carried_anti_tasks:
+                task.remove_anti_task(atask)
+                atask.reference_task(target_task)
             raise ValueError("Failed to edit task, pontential overlap, anti-tasks will not carry over if they can't be re-added to modified task")
+
+        # swap the original task for the edited one
+        if self.journal is not None:
+            self.journal.append(("edit", target_task, task, carried_anti_tasks, [atask.store_order for atask in carried_anti_tasks]))
+            self.deferred_checks.append(task)
+        self.unstore_task(target_task)
+        self.store_task(task)
+        self.log_change("edit", task_name, task)
+        self.schedule_changed()
+        return True
+
+
+    # groups many adds, deletes and edits into one change:
+    #     with model.batch():
+    #         model.edit_task(...)
+    #         model.add_task(...)
+    # inside the block, the overlap checks of added and edited tasks are deferred, then run together against the indexes when the block ends,
+    # so tasks can be moved through each other's old slots. if a check fails or the block raises, every change in it is undone from the journal.
+    # a batch opened inside another one is undone on its own if it fails, and checked with the outer batch otherwise.
+    # the event caches are dropped when the outermost batch starts and ends, instead of after every change, and are not filled while it is open
+    @contextmanager
+    def batch(self):
+        outermost = self.journal is None
+        if outermost:
+            self.invalidate_event_cache()
+            self.journal = []
+            self.deferred_checks = []
+        journal_start, checks_start, changes_start = len(self.journal), len(self.deferred_checks), len(self.pending_changes)
+
+        try:
+            yield self
+            if outermost:
+                self.check_deferred_tasks()
+        except:
+            self.undo_journal(journal_start)
+            del self.deferred_checks[checks_start:]
+            del self.pending_changes[changes_start:]
+            raise
+        finally:
+            if outermost:
+                self.journal = None
+                self.deferred_checks = []
+                self.invalidate_event_cache()
+                self.commit_changes()
+
+
+    # runs the overlap checks deferred by the current batch, against every task in the model once all the changes are in.
+    # raises ValueError if any added or edited task that is still in the model overlaps another task
+    def check_deferred_tasks(self):
+        for task in self.deferred_checks:
+            if self.tasks_by_name.get(task.name) is not task:
+                continue  # deleted or edited again later in the batch
+            start, end = get_task_minute_range(task)
+            for existing_task in self.find_overlap_candidates(start, end):
+                if existing_task is not task and check_overlap(existing_task, task):
+                    raise ValueError('Task overlaps an existing task')
+
+
+    # undoes the changes journaled by the current batch after position start, newest first.
+    # deleted and edited tasks are stored back with their old order keys, and the collections are sorted by key once at the end,
+    # so the task order is the same as before the batch
+    def undo_journal(self, start: int = 0):
+        restored = False
+        while len(self.journal) > start:
+            change = self.journal.pop()
+            if change[0] == "add":
+                self.unstore_task(change[1])
+            elif change[0] == "add_anti":
+                anti_task = change[1]
+                anti_task.task_reference.remove_anti_task(anti_task)
+                self.mark_cancelled_occupancy(anti_task, True)
+                anti_task.reference_task(None)
+                del self.anti_tasks[anti_task.name]
+                del self.tasks_by_name[anti_task.name]
+            elif change[0] == "add_many":
+                self.discard_added_tasks(change[1])
+            elif change[0] == "delete":
+                self.store_task(change[1], keep_store_order=True)
+                restored = True
+            elif change[0] == "delete_anti":
+                _, anti_task, rectask = change
+                rectask.add_anti_task(anti_task)
+                anti_task.reference_task(rectask)
+                self.mark_cancelled_occupancy(anti_task, False)
+                self.anti_tasks[anti_task.name] = anti_task
+                self.tasks_by_name[anti_task.name] = anti_task
+                restored = True
+            elif change[0] == "edit":
+                _, target_task, task, carried_anti_tasks, carried_store_orders = change
+                self.unstore_task(task)
+                for atask, store_order in zip(carried_anti_tasks, carried_store_orders):
+                    task.remove_anti_task(atask)
+                    atask.reference_task(target_task)
+                    atask.store_order = store_order
+                self.store_task(target_task, keep_store_order=True)
+                restored = True
+
+        if restored:
+            for tasks in (self.recurring_tasks, self.anti_tasks, self.transient_tasks):
+                # a database keeps its transient tasks in rowid order, and they were stored back with their old rowids
+                if isinstance(tasks, dict):
+                    sort_by_store_order(tasks)
@@ -0,0 +1,87 @@
+from Task.Task import RecurringTask
+from Task.TimeCore import MINUTES_PER_DAY
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 96  # every task starts and ends on a quarter hour, so a day has 96 slots
+
+
+# Bitmap of the busy quarter hours of each day, keyed by day number. Bit n of a day is set when the slot starting
+# at minute 15 * n is taken by a transient task or by an uncancelled occurrence of a recurring task.
+# the recurring overlap check lets a few recurring tasks share slots, so slots taken more than once are also counted
+# separately, and removing one of the tasks leaves the slot busy
+class OccupancyIndex:
+    def __init__(self):
+        self.days: dict[int, int] = {}
+        self.extra_counts: dict[int, dict[int, int]] = {}  # day -> {slot: number of tasks beyond the first taking it}
+
+    # sets (busy=True) or clears the bits of the slots in [start_minute, end_minute)
+    def mark(self, start_minute: int, end_minute: int, busy: bool):
+        slot = start_minute // SLOT_MINUTES
+        end_slot = end_minute // SLOT_MINUTES
+        while slot < end_slot:
+            day, first = divmod(slot, SLOTS_PER_DAY)
+            last = min(end_slot - day * SLOTS_PER_DAY, SLOTS_PER_DAY)
+            bits = ((1 << (last - first)) - 1) << first
+            if busy:
+                self.set_bits(day, bits)
+            else:
+                self.clear_bits(day, bits)
+            slot = day * SLOTS_PER_DAY + last
+
+    def set_bits(self, day: int, bits: int):
+        existing = self.days.get(day, 0)
+        if existing & bits:
+            extra_counts = self.extra_counts.setdefault(day, {})
+            for slot in range(SLOTS_PER_DAY):
+                if (existing & bits) >> slot & 1:
+                    extra_counts[slot] = extra_counts.get(slot, 0) + 1
+        self.days[day] = existing | bits
+
+    def clear_bits(self, day: int, bits: int):
+        # slots that another task also takes stay busy, only their count goes down
+        still_busy = 0
+        extra_counts = self.extra_counts.get(day)
+        if extra_counts:
+            for slot in [slot for slot in extra_counts if bits >> slot & 1]:
+                still_busy |= 1 << slot
+                extra_counts[slot] -= 1
+                if not extra_counts[slot]:
+                    del extra_counts[slot]
+            if not extra_counts:
+                del self.extra_counts[day]
+
+        remaining = self.days.get(day, 0) & ~bits | still_busy
+        if remaining:
+            self.days[day] = remaining
+        else:
+            self.days.pop(day, None)
+
+    # sets or clears the slots of a transient task, or of every uncancelled occurrence of a recurring task
+    def mark_task(self, task, busy: bool):
+        if type(task) is RecurringTask:
+            period = task.frequency * MINUTES_PER_DAY
+            for start_minute in range(task.start_minute, task.last_start_minute + 1, period):
+                if not task.is_cancelled(start_minute):
+                    self.mark(start_minute, start_minute + task.duration_minutes, busy)
+        else:
+            self.mark(task.start_minute, task.end_minute, busy)
+
+    # returns the bitmap of a day, 0 if nothing happens on it
+    def get_day(self, day: int) -> int:
+        return self.days.get(day, 0)
+
+    # returns True if no slot in [start_minute, end_minute) is taken
+    def is_free(self, start_minute: int, end_minute: int) -> bool:
+        slot = start_minute // SLOT_MINUTES
+        end_slot = end_minute // SLOT_MINUTES
+        while slot < end_slot:
+            day, first = divmod(slot, SLOTS_PER_DAY)
+            last = min(end_slot - day * SLOTS_PER_DAY, SLOTS_PER_DAY)
+            if self.days.get(day, 0) & (((1 << (last - first)) - 1) << first):
+                return False
+            slot = day * SLOTS_PER_DAY + last
+        return True
+
+    def clear(self):
+        self.days.clear()
+        self.extra_counts.clear()
@@ -0,0 +1,122 @@
+import struct
+import sys
+from array import array
+
+from Task.Task import RecurringTask, restore_transient_task, restore_anti_task
+from Task.TimeCore import get_time_from_minutes, MINUTES_PER_DAY
+
+# Binary snapshot of a schedule, for saving and restoring the exact state of a Model quickly. JSON stays the format for
+# exchanging schedules. Layout, all little-endian:
+#   header              magic, version, then the number of strings, recurring tasks, anti-tasks and transient tasks
+#   string table        the length of each string in characters, then the UTF-8 bytes of all of them (prefixed by their byte count)
+#   recurring tasks     name, type, start date, start minute, duration in minutes, end date, frequency, flags
+#   anti-tasks          name, position of its recurring task among the recurring records, start date, start minute, duration in minutes, flags
+#   transient tasks     name, type, start date, start minute, duration in minutes, flags
+# names and types are positions in the string table. the flags record which of the start time and duration were given as floats,
+# so the tasks come back with the same values they were saved with. tasks are saved in the order they were added
+
+SNAPSHOT_MAGIC = b"PSSSNAP\0"
+SNAPSHOT_VERSION = 2
+
+HEADER = struct.Struct("<8sHIIII")
+BLOB_SIZE = struct.Struct("<I")
+RECURRING_RECORD = struct.Struct("<IIIqHIHB")
+ANTI_RECORD = struct.Struct("<IIIqHB")
+TRANSIENT_RECORD = struct.Struct("<IIIqHB")
+
+FLOAT_START_TIME = 1
+FLOAT_DURATION = 2
+
+
+# returns the flags of a task's record
+def get_time_flags(task) -> int:
+    return (FLOAT_START_TIME if isinstance(task.start_time, float) else 0) | (FLOAT_DURATION if isinstance(task.duration, float) else 0)
+
+
+# writes a snapshot of the given tasks to a binary file object
+def write_snapshot(file, recurring_tasks, anti_tasks, transient_tasks):
+    strings: dict[str, int] = {}
+
+    def string_index(string: str) -> int:
+        return strings.setdefault(string, len(strings))
+
+    recurring_tasks = list(recurring_tasks)
+    recurring_positions = {id(task): position for position, task in enumerate(recurring_tasks)}
+
+    recurring_records = b"".join(RECURRING_RECORD.pack(string_index(task.name), string_index(task.task_type), task.start_date, task.start_minute,
+                                                       task.duration_minutes, task.end_date, task.frequency, get_time_flags(task)) for task in recurring_tasks)
+    anti_records = [ANTI_RECORD.pack(string_index(task.name), recurring_positions[id(task.task_reference)], task.start_date, task.start_minute,
+                                     task.duration_minutes, get_time_flags(task)) for task in anti_tasks]
+    transient_records = [TRANSIENT_RECORD.pack(string_index(task.name), string_index(task.task_type), task.start_date, task.start_minute,
+                                               task.duration_minutes, get_time_flags(task)) for task in transient_tasks]
+
+    lengths = array("I", [len(string) for string in strings])
+    if sys.byteorder == "big":
+        lengths.byteswap()
+    blob = "".join(strings).encode("utf-8")
+
+    file.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(strings), len(recurring_tasks), len(anti_records), len(transient_records)))
+    file.write(lengths.tobytes())
+    file.write(BLOB_SIZE.pack(len(blob)))
+    file.write(blob)
+    file.write(recurring_records)
+    file.write(b"".join(anti_records))
+    file.write(b"".join(transient_records))
+
+
+# reads a snapshot written by write_snapshot, returning its recurring tasks, anti-tasks and transient tasks.
+# the anti-tasks are already attached to their recurring tasks. the tasks are rebuilt as they were saved, without validating them again.
+# raises ValueError if the file is not a snapshot, was written by an unsupported version, or is cut short
+def read_snapshot(file) -> tuple[list, list, list]:
+    data = memoryview(file.read())
+    try:
+        magic, version, string_count, recurring_count, anti_count, transient_count = HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("File is not a schedule snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {version}")
+        offset = HEADER.size
+
+        lengths = array("I")
+        lengths.frombytes(data[offset:offset + string_count * lengths.itemsize])
+        if sys.byteorder == "big":
+            lengths.byteswap()
+        offset += string_count * lengths.itemsize
+        blob_size, = BLOB_SIZE.unpack_from(data, offset)
+        offset += BLOB_SIZE.size
+        text = str(data[offset:offset + blob_size], "utf-8")
+        offset += blob_size
+
+        strings = []
+        position = 0
+        for length in lengths:
+            strings.append(text[position:position + length])
+            position += length
+
+        def records(record: struct.Struct, count: int):
+            nonlocal offset
+            section = data[offset:offset + record.size * count]
+            if len(section) != record.size * count:
+                raise ValueError("Snapshot is cut short or damaged")
+            offset += record.size * count
+            return record.iter_unpack(section)
+
+        # recurring tasks are few, so they go through the regular constructor
+        recurring_tasks = [RecurringTask(strings[name], strings[task_type], start_date, get_time_from_minutes(start_minute % MINUTES_PER_DAY, flags & FLOAT_START_TIME),
+                                         get_time_from_minutes(duration_minutes, flags & FLOAT_DURATION), end_date, frequency)
+                           for name, task_type, start_date, start_minute, duration_minutes, end_date, frequency, flags in records(RECURRING_RECORD, recurring_count)]
+
+        anti_tasks = []
+        for name, recurring_position, start_date, start_minute, duration_minutes, flags in records(ANTI_RECORD, anti_count):
+            anti_task = restore_anti_task(strings[name], start_date, start_minute, duration_minutes, flags & FLOAT_START_TIME, flags & FLOAT_DURATION)
+            rectask = recurring_tasks[recurring_position]
+            rectask.add_anti_task(anti_task)
+            anti_task.reference_task(rectask)
+            anti_tasks.append(anti_task)
+
+        transient_tasks = [restore_transient_task(strings[name], strings[task_type], start_date, start_minute, duration_minutes, flags & FLOAT_START_TIME, flags & FLOAT_DURATION)
+                           for name, task_type, start_date, start_minute, duration_minutes, flags in records(TRANSIENT_RECORD, transient_count)]
+    except (struct.error, IndexError, UnicodeDecodeError):
+        raise ValueError("Snapshot is cut short or damaged")
+
+    return recurring_tasks, anti_tasks, transient_tasks
@@ -0,0 +1,238 @@
+import sqlite3
+import weakref
+
+from Task.Task import RecurringTask, TransientTask, AntiTask
+from Task.TimeCore import MINUTES_PER_DAY
+
+# start_time and duration have no declared type, so SQLite keeps each value as the int or float it was given
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS recurring_tasks (
+    name TEXT PRIMARY KEY, task_type TEXT, start_date INTEGER, start_time, duration,
+    end_date INTEGER, frequency INTEGER, start_minute INTEGER, end_minute INTEGER
+);
+CREATE TABLE IF NOT EXISTS anti_tasks (
+    name TEXT PRIMARY KEY, task_name TEXT, start_date INTEGER, start_time, duration,
+    start_minute INTEGER, end_minute INTEGER
+);
+CREATE TABLE IF NOT EXISTS transient_tasks (
+    name TEXT PRIMARY KEY, task_type TEXT, start_date INTEGER, start_time, duration,
+    start_minute INTEGER, end_minute INTEGER
+);
+CREATE INDEX IF NOT EXISTS transient_tasks_by_start ON transient_tasks (start_minute, end_minute);
+CREATE INDEX IF NOT EXISTS anti_tasks_by_task ON anti_tasks (task_name);
+'''
+
+TRANSIENT_COLUMNS = "name, task_type, start_date, start_time, duration, rowid"
+
+# every row is written with the order key of its task as its rowid, so the tables keep the tasks in the Model's order
+RECURRING_ROW_COLUMNS = "rowid, name, task_type, start_date, start_time, duration, end_date, frequency, start_minute, end_minute"
+ANTI_ROW_COLUMNS = "rowid, name, task_name, start_date, start_time, duration, start_minute, end_minute"
+TRANSIENT_ROW_COLUMNS = "rowid, name, task_type, start_date, start_time, duration, start_minute, end_minute"
+
+
+def get_recurring_row(task: RecurringTask) -> tuple:
+    return (task.store_order, task.name, task.task_type, task.start_date, task.start_time, task.duration,
+            task.end_date, task.frequency, task.start_minute, task.last_end_minute)
+
+def get_anti_row(task: AntiTask) -> tuple:
+    return (task.store_order, task.name, task.task_reference.name, task.start_date, task.start_time, task.duration,
+            task.start_minute, task.end_minute)
+
+def get_transient_row(task: TransientTask) -> tuple:
+    return (task.store_order, task.name, task.task_type, task.start_date, task.start_time, task.duration,
+            task.start_minute, task.end_minute)
+
+
+# Opens (or creates) a schedule database and holds the collections a Model keeps its tasks in when it is backed by one.
+# recurring tasks and anti-tasks are few and every overlap check needs them, so they are loaded into memory when the database
+# is opened and written through to their tables as they change. transient tasks only live in their table, and are read back
+# as queries need them. nothing is written to the file until commit() is called
+class SqliteStore:
+    def __init__(self, file_name: str):
+        # the Viewer runs long operations on a worker thread, one at a time, so the connection is not tied to the thread that opened it
+        self.connection = sqlite3.connect(file_name, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+
+        self.recurring_tasks = SqliteRuleTasks(self.connection, "recurring_tasks", RECURRING_ROW_COLUMNS, get_recurring_row)
+        self.anti_tasks = SqliteRuleTasks(self.connection, "anti_tasks", ANTI_ROW_COLUMNS, get_anti_row)
+        self.transient_tasks = SqliteTransientTasks(self.connection)
+        self.tasks_by_name = SqliteTaskNames(self.transient_tasks)
+        self.load_rule_tasks()
+
+    # reads the recurring tasks and anti-tasks into memory, attaching every anti-task to its recurring task
+    def load_rule_tasks(self):
+        for *row, rowid in self.connection.execute("SELECT name, task_type, start_date, start_time, duration, end_date, frequency, rowid FROM recurring_tasks ORDER BY rowid"):
+            task = RecurringTask(*row)
+            task.store_order = rowid
+            dict.__setitem__(self.recurring_tasks, task.name, task)
+            dict.__setitem__(self.tasks_by_name, task.name, task)
+
+        for name, task_name, start_date, start_time, duration, rowid in self.connection.execute("SELECT name, task_name, start_date, start_time, duration, rowid FROM anti_tasks ORDER BY rowid"):
+            anti_task = AntiTask(name, start_date, start_time, duration)
+            anti_task.store_order = rowid
+            rectask = self.recurring_tasks[task_name]
+            rectask.add_anti_task(anti_task)
+            anti_task.reference_task(rectask)
+            dict.__setitem__(self.anti_tasks, anti_task.name, anti_task)
+            dict.__setitem__(self.tasks_by_name, anti_task.name, anti_task)
+
+    # returns the order key after the largest rowid in the database, for the Model to give the next task it stores
+    def get_next_store_order(self) -> int:
+        return max(self.connection.execute(f"SELECT IFNULL(MAX(rowid), 0) FROM {table}").fetchone()[0]
+                   for table in ("recurring_tasks", "anti_tasks", "transient_tasks")) + 1
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+# dict of recurring tasks or anti-tasks by name that writes every change through to its table
+class SqliteRuleTasks(dict):
+    def __init__(self, connection, table: str, columns: str, get_row):
+        super().__init__()
+        self.connection = connection
+        self.table = table
+        self.columns = columns
+        self.get_row = get_row
+
+    def __setitem__(self, name: str, task):
+        row = self.get_row(task)
+        self.connection.execute(f"INSERT OR REPLACE INTO {self.table} ({self.columns}) VALUES ({', '.join('?' * len(row))})", row)
+        super().__setitem__(name, task)
+
+    def __delitem__(self, name: str):
+        super().__delitem__(name)
+        self.connection.execute(f"DELETE FROM {self.table} WHERE name = ?", (name,))
+
+    def pop(self, name: str, *default):
+        if name in self:
+            task = self[name]
+            del self[name]
+            return task
+        return super().pop(name, *default)
+
+
+# The transient tasks of the database, by name. Used by the Model both as its dict of transient tasks and as its
+# interval index over them: overlap and timeframe queries become range queries on the (start_minute, end_minute) index.
+# a task read from the table is the same object every time while anything still refers to it, so the Model's identity
+# checks keep working, and it is freed once nothing does
+class SqliteTransientTasks:
+    def __init__(self, connection):
+        self.connection = connection
+        self.loaded_tasks = weakref.WeakValueDictionary()
+
+    # returns the task of a row, reusing the object already loaded for it if there is one
+    def get_task(self, row: tuple) -> TransientTask:
+        task = self.loaded_tasks.get(row[0])
+        if task is None:
+            task = TransientTask(*row[:5])
+            task.store_order = row[5]
+            self.loaded_tasks[task.name] = task
+        return task
+
+    def __setitem__(self, name: str, task: TransientTask):
+        self.connection.execute(f"INSERT OR REPLACE INTO transient_tasks ({TRANSIENT_ROW_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", get_transient_row(task))
+        self.loaded_tasks[name] = task
+
+    def __getitem__(self, name: str) -> TransientTask:
+        task = self.get(name)
+        if task is None:
+            raise KeyError(name)
+        return task
+
+    def get(self, name: str, default=None):
+        task = self.loaded_tasks.get(name)
+        if task is not None:
+            return task
+        row = self.connection.execute(f"SELECT {TRANSIENT_COLUMNS} FROM transient_tasks WHERE name = ?", (name,)).fetchone()
+        return self.get_task(row) if row is not None else default
+
+    def __delitem__(self, name: str):
+        if self.connection.execute("DELETE FROM transient_tasks WHERE name = ?", (name,)).rowcount == 0:
+            raise KeyError(name)
+        self.loaded_tasks.pop(name, None)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.loaded_tasks or self.connection.execute("SELECT 1 FROM transient_tasks WHERE name = ?", (name,)).fetchone() is not None
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM transient_tasks").fetchone()[0]
+
+    def __iter__(self):
+        return (name for name, in self.connection.execute("SELECT name FROM transient_tasks ORDER BY rowid"))
+
+    # the tasks in the order they were added, read in a single pass over the table
+    def values(self):
+        return TransientTaskValues(self)
+
+    # yields (start_minute, end_minute) of every task without loading the tasks themselves
+    def iter_minute_ranges(self):
+        return self.connection.execute("SELECT start_minute, end_minute FROM transient_tasks")
+
+    # rows are written and deleted through the dict methods above, so the interval index methods have nothing left to do
+    def insert(self, start: int, end: int, task):
+        pass
+
+    def insert_many(self, entries: list[tuple]):
+        pass
+
+    def remove(self, start: int, task) -> bool:
+        return True
+
+    def remove_many(self, tasks):
+        pass
+
+    # returns every task whose interval overlaps [start, end), in start order.
+    # no transient task is a day or longer, so only the index entries starting in the day before start are looked at
+    def overlapping(self, start: int, end: int) -> list:
+        return list(self.iter_overlapping(start, end))
+
+    def iter_overlapping(self, start: int, end: int):
+        rows = self.connection.execute(f"SELECT {TRANSIENT_COLUMNS} FROM transient_tasks WHERE start_minute > ? AND start_minute < ? AND end_minute > ? ORDER BY start_minute",
+                                       (start - MINUTES_PER_DAY, end, start))
+        return (self.get_task(row) for row in rows)
+
+
+# the values of a SqliteTransientTasks, read from the table each time they are iterated
+class TransientTaskValues:
+    def __init__(self, transient_tasks: SqliteTransientTasks):
+        self.transient_tasks = transient_tasks
+
+    def __len__(self):
+        return len(self.transient_tasks)
+
+    def __iter__(self):
+        rows = self.transient_tasks.connection.execute(f"SELECT {TRANSIENT_COLUMNS} FROM transient_tasks ORDER BY rowid")
+        return (self.transient_tasks.get_task(row) for row in rows)
+
+
+# every task in the database by name. recurring tasks and anti-tasks are kept in the dict itself, transient tasks are
+# looked up in their table, where SqliteTransientTasks already adds and removes them
+class SqliteTaskNames(dict):
+    def __init__(self, transient_tasks: SqliteTransientTasks):
+        super().__init__()
+        self.transient_tasks = transient_tasks
+
+    def __setitem__(self, name: str, task):
+        if type(task) is not TransientTask:
+            super().__setitem__(name, task)
+
+    def __getitem__(self, name: str):
+        task = self.get(name)
+        if task is None:
+            raise KeyError(name)
+        return task
+
+    def get(self, name: str, default=None):
+        task = super().get(name)
+        if task is None:
+            task = self.transient_tasks.get(name)
+        return task if task is not None else default
+
+    def __contains__(self, name: str) -> bool:
+        return super().__contains__(name) or name in self.transient_tasks
+
+    def __delitem__(self, name: str):
+        super().pop(name, None)
@@ -1,6 +1,12 @@
+from .TimeCore import get_day_from_date, get_minutes_from_time, get_time_from_minutes, MINUTES_PER_DAY
+
 # Parent Task class
 # All tasks have a name, a type, a start date and time, and a duration
 class Task:
+    # slotted so the many tasks of a large schedule do not each carry an attribute dict.
+    # store_order is the order key a Model gives the task when it stores it
+    __slots__ = ("name", "task_type", "start_time", "duration", "start_date", "start_day", "duration_minutes", "start_minute", "end_minute", "store_order")
+
     def __init__(self, name: str, task_type: str, start_date: int, start_time: float, duration: float):
         self.name = name
         self.task_type = task_type
@@ -14,6 +20,12 @@ class Task:
 
         if self.duration < 0.25 or self.duration > 23.75:
             raise ValueError("Duration must be between 0.25 and 23.75")
+
+        # integer time core, computed once so overlap checks can compare plain minutes
+        self.start_day = get_day_from_date(start_date)
+        self.duration_minutes = get_minutes_from_time(duration)
+        self.start_minute = self.start_day * MINUTES_PER_DAY + get_minutes_from_time(start_time)
+        self.end_minute = self.start_minute + self.duration_minutes
     
     # return it as a dictionary, which can then be used for JSON
     def to_dict(self):
@@ -29,16 +41,36 @@ class Task:
 
 # it is assumed that a recurring task will have it's end_date set at or after the last week day. In other words, end_date can't be 5/1/24 when Thursday is set to True.
 class RecurringTask(Task):
+    __slots__ = ("end_date", "frequency", "anti_tasks", "anti_tasks_by_start", "end_day", "last_start_minute", "last_end_minute")
+
     def __init__(self, name: str, task_type: str, start_date: int, start_time: float, duration: float, end_date: int, frequency: int): 
         super().__init__(name, task_type, start_date, start_time, duration)
         self.end_date = end_date
         self.frequency = frequency
         self.anti_tasks: list[AntiTask] = []
+        self.anti_tasks_by_start: dict[int, AntiTask] = {}  # cancelled occurrences, keyed by the anti-task's start minute
 
-    # Adds an anti-task to this Recurring Task's list of anti-tasks (not utilized yet)
+        # start and end minute of the last occurrence, which is the last one on or before end_date
+        self.end_day = get_day_from_date(end_date)
+        occurrences = (self.end_day - self.start_day) // frequency
+        self.last_start_minute = self.start_minute + occurrences * frequency * MINUTES_PER_DAY
+        self.last_end_minute = self.last_start_minute + self.duration_minutes
+
+    # Adds an anti-task to this Recurring Task's list of anti-tasks
     def add_anti_task(self, anti_task):
         self.anti_tasks.append(anti_task)
+        self.anti_tasks_by_start[anti_task.start_minute] = anti_task
         # check to see if end_date is after last week day ... ?
+
+    # Removes an anti-task from this Recurring Task, restoring the occurrence it cancelled
+    def remove_anti_task(self, anti_task):
+        self.anti_tasks.remove(anti_task)
+        if self.anti_tasks_by_start.get(anti_task.start_minute) is anti_task:
+            del self.anti_tasks_by_start[anti_task.start_minute]
+
+    # returns True if the occurrence starting at the given absolute minute is cancelled by an anti-task
+    def is_cancelled(self, occurrence_start_minute: int) -> bool:
+        return occurrence_start_minute in self.anti_tasks_by_start
     
     def to_dict(self):
         d = {                      # in the Recurring Task, its named StartDate, while the others are named Date, so it makes it hard to reuse code here
@@ -54,9 +86,12 @@ class RecurringTask(Task):
     
 
 class TransientTask(Task):
-    pass
+    # weakly referenceable, so a database backed Model can hand out the same object for a row while it is in use
+    __slots__ = ("__weakref__",)
 
 class AntiTask(Task):
+    __slots__ = ("task_reference",)
+
     def __init__(self, name: str, start_date: int, start_time: float, duration: float): 
         super().__init__(name, "Cancellation", start_date, start_time, duration)
         self.task_reference = None
@@ -66,8 +101,42 @@ class AntiTask(Task):
         self.task_reference = task
 
 
+# fills in the fields of a task created with __new__ from values that were already validated, such as the ones saved in a
+# snapshot of a schedule. skips the date parsing and checks of __init__, which dominate the time to load a large schedule.
+# float_start_time and float_duration say whether the start time and duration were given as floats or as ints
+def restore_task_fields(task: Task, name: str, task_type: str, start_date: int, start_minute: int, duration_minutes: int,
+                        float_start_time: bool = True, float_duration: bool = True):
+    task.name = name
+    task.task_type = task_type
+    task.start_date = start_date
+    task.start_time = get_time_from_minutes(start_minute % MINUTES_PER_DAY, float_start_time)
+    task.duration = get_time_from_minutes(duration_minutes, float_duration)
+    task.start_day = start_minute // MINUTES_PER_DAY
+    task.duration_minutes = duration_minutes
+    task.start_minute = start_minute
+    task.end_minute = start_minute + duration_minutes
+
+# returns the same TransientTask as TransientTask(name, task_type, start_date, start_time, duration), from already validated values
+def restore_transient_task(name: str, task_type: str, start_date: int, start_minute: int, duration_minutes: int,
+                           float_start_time: bool = True, float_duration: bool = True) -> TransientTask:
+    task = TransientTask.__new__(TransientTask)
+    restore_task_fields(task, name, task_type, start_date, start_minute, duration_minutes, float_start_time, float_duration)
+    return task
+
+# returns the same AntiTask as AntiTask(name, start_date, start_time, duration), from already validated values
+def restore_anti_task(name: str, start_date: int, start_minute: int, duration_minutes: int,
+                      float_start_time: bool = True, float_duration: bool = True) -> AntiTask:
+    task = AntiTask.__new__(AntiTask)
+    restore_task_fields(task, name, "Cancellation", start_date, start_minute, duration_minutes, float_start_time, float_duration)
+    task.task_reference = None
+    return task
+
+
 # Represents a single event that will be displayed on the calendar. Similar, but not the same as Task, because tasks may repeat (recurring tasks), or be negations like the anti taks
 class Event():
+    # timeframe queries create one Event per occurrence, so they are slotted to keep month and year views small
+    __slots__ = ("start_date", "start_time", "duration", "task")
+
     def __init__(self, start_date: int, start_time: float, duration: float, task: Task): 
         self.start_date = start_date
         self.start_time = start_time
@@ -0,0 +1,44 @@
+from datetime import date
+
+# Compact integer time representation shared by tasks, overlap checks and event expansion.
+# Days are counted from 0001-01-01 (the same numbering as date.toordinal()), and moments in time
+# are absolute minutes since 0001-01-01 00:00, so comparing two tasks never needs a datetime.
+
+MINUTES_PER_DAY = 1440
+
+
+# returns the day number of an integer date (YYYYMMDD)
+def get_day_from_date(date_int: int) -> int:
+    date_str = str(date_int)   # YYYYMMDD
+    return date(int(date_str[0:4]), int(date_str[4:6]), int(date_str[6:8])).toordinal()
+
+
+# returns the integer date (YYYYMMDD) of a day number
+def get_date_from_day(day: int) -> int:
+    d = date.fromordinal(day)
+    return d.year * 10000 + d.month * 100 + d.day
+
+
+# converts a decimal hour value (start time or duration) into whole minutes.
+# only quarter hours are allowed, matching the 15 minute time slots of the schedule
+def get_minutes_from_time(time: float) -> int:
+    minutes = time * 60
+    if minutes != int(minutes) or int(minutes) % 15 != 0:
+        raise ValueError("Times and durations must be in 0.25 hour increments")
+    return int(minutes)
+
+
+# converts whole minutes back into a decimal hour value. as_float=False gives an int, for a value that was given as whole hours
+def get_time_from_minutes(minutes: int, as_float: bool = True):
+    return minutes / 60 if as_float else minutes // 60
+
+
+# returns the integer date and decimal time of an absolute minute
+def get_date_and_time_from_minute(minute: int) -> tuple[int, float]:
+    day, minute_of_day = divmod(minute, MINUTES_PER_DAY)
+    return get_date_from_day(day), minute_of_day / 60
+
+
+# returns the weekday of a day number, Monday is 0 and Sunday is 6 (same as datetime.weekday())
+def get_weekday_from_day(day: int) -> int:
+    return (day + 6) % 7
@@ -0,0 +1,45 @@
+# Measures the memory used by 1M Events with the slotted layout in Task/Task.py,
+# against the same class backed by a per-instance attribute dict.
+# run from the repository root with: python -m Tests.EventMemoryBenchmark
+import sys
+import tracemalloc
+
+from Task.Task import TransientTask, Event
+
+EVENT_COUNT = 1_000_000
+
+
+# the layout Event had before it was slotted
+class DictEvent():
+    def __init__(self, start_date: int, start_time: float, duration: float, task):
+        self.start_date = start_date
+        self.start_time = start_time
+        self.duration = duration
+        self.task = task
+
+
+# returns the bytes allocated while building event_count events of the given class
+def measure(event_class, task, event_count: int) -> int:
+    tracemalloc.start()
+    events = [event_class(20240101, 12.0, 1.0, task) for _ in range(event_count)]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del events
+    return allocated
+
+
+def main():
+    event_count = int(sys.argv[1]) if len(sys.argv) > 1 else EVENT_COUNT
+    task = TransientTask("benchmark", "test", 20240101, 12.0, 1.0)
+
+    dict_bytes = measure(DictEvent, task, event_count)
+    slotted_bytes = measure(Event, task, event_count)
+
+    print(f"{event_count} events")
+    print(f"dict-backed: {dict_bytes / 2**20:8.1f} MiB  ({dict_bytes / event_count:6.1f} bytes per event)")
+    print(f"slotted:     {slotted_bytes / 2**20:8.1f} MiB  ({slotted_bytes / event_count:6.1f} bytes per event)")
+    print(f"saved:       {(dict_bytes - slotted_bytes) / 2**20:8.1f} MiB  ({(dict_bytes - slotted_bytes) / event_count:6.1f} bytes per event)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,14 @@
 import unittest
 import operator
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+from itertools import islice
 from Model.Model import Model
+from Model.ColumnarEvents import columnar_available
+from Model.MappedModel import MappedModel
 from Task.Task import Task, RecurringTask, TransientTask, AntiTask
 
 
@@ -141,6 +149,492 @@ class TestModel(unittest.TestCase):
         result = test_model.add_task(test_task4)
         self.assertEqual(result, True, 'Adding transient task over valid anti-tasks failed.')
 
+    def test_overlap_found_among_many_transients(self):
+        test_model = Model()
+        for day in range(1, 29):
+            test_model.add_task(TransientTask("morning" + str(day), "test", 20240500 + day, 9.00, 1.00))
+            test_model.add_task(TransientTask("evening" + str(day), "test", 20240500 + day, 23.00, 2.00))
+        self.assertRaises(ValueError, lambda: test_model.add_task(TransientTask("late", "test", 20240515, 0.50, 1.00)))
+        result = test_model.add_task(TransientTask("midday", "test", 20240515, 12.00, 1.00))
+        self.assertEqual(result, True, 'Adding transient task between indexed tasks failed.')
+
+    def test_events_for_long_running_recurring_task(self):
+        test_model = Model()
+        test_model.add_task(RecurringTask("daily", "test", 20140515, 23.00, 2.00, 20340515, 1))
+        test_model.add_task(RecurringTask("weekly", "test", 20140516, 12.00, 1.00, 20340515, 7))
+        events = test_model.get_events_within_timeframe(20240517, 1)
+        self.assertEqual([(event.task.name, event.start_date, event.start_time) for event in events],
+                         [("daily", 20240516, 23.00), ("weekly", 20240517, 12.00), ("daily", 20240517, 23.00)])
+
+    def test_delete_anti_task_restores_occurrence(self):
+        test_model = Model()
+        test_model.add_task(RecurringTask("daily", "test", 20240515, 18.00, 1.00, 20240615, 1))
+        test_model.add_task(AntiTask("skip", 20240517, 18.00, 1.00))
+        self.assertEqual(test_model.get_events_within_timeframe(20240517, 1), [])
+        self.assertRaises(LookupError, lambda: test_model.add_task(AntiTask("skip again", 20240517, 18.00, 1.00)))
+        test_model.delete_task("skip")
+        self.assertEqual(len(test_model.get_events_within_timeframe(20240517, 1)), 1)
+        self.assertEqual(list(test_model.get_anti_tasks()), [])
+
+    def test_day_event_cache_invalidated_on_change(self):
+        test_model = Model()
+        test_model.add_task(TransientTask("first", "test", 20240515, 12.00, 1.00))
+        self.assertEqual(len(test_model.get_events_for_day(20240515)), 1)
+        test_model.add_task(TransientTask("second", "test", 20240515, 14.00, 1.00))
+        self.assertEqual(len(test_model.get_events_for_day(20240515)), 2)
+        test_model.delete_task("first")
+        self.assertEqual([event.task.name for event in test_model.get_events_for_day(20240515)], ["second"])
+
+    def test_events_by_day_matches_single_day_queries(self):
+        test_model = Model()
+        test_model.add_task(RecurringTask("daily", "test", 20240501, 23.00, 2.00, 20240531, 1))
+        test_model.add_task(TransientTask("lunch", "test", 20240510, 12.00, 1.00))
+        events_by_day = test_model.get_events_by_day(20240509, 3)
+        self.assertEqual(list(events_by_day.keys()), [20240509, 20240510, 20240511])
+        for date, events in events_by_day.items():
+            expected = test_model.get_events_within_timeframe(date, 1)
+            self.assertEqual([(event.task.name, event.start_date) for event in events],
+                             [(event.task.name, event.start_date) for event in expected])
+
+    def test_failed_import_restores_names_and_anti_tasks(self):
+        test_model = Model()
+        test_model.add_task(RecurringTask("daily", "test", 20240515, 18.00, 1.00, 20240615, 1))
+        schedule = '''[
+            {"Name": "skip", "Type": "Cancellation", "Date": 20240517, "StartTime": 18.0, "Duration": 1.0},
+            {"Name": "clash", "Type": "Study", "Date": 20240520, "StartTime": 18.0, "Duration": 1.0}
+        ]'''
+        self.assertRaises(ValueError, lambda: test_model.import_schedule_from_json(schedule))
+        self.assertEqual(list(test_model.get_anti_tasks()), [])
+        self.assertEqual(len(test_model.get_events_within_timeframe(20240517, 1)), 1)
+        self.assertRaises(LookupError, lambda: test_model.delete_task("skip"))
+        self.assertEqual(test_model.find_task_by_name("daily").name, "daily")
+
+    def test_task_accessors_are_partitioned_by_type(self):
+        test_model = Model()
+        transient_tasks = test_model.get_transient_tasks()
+        test_model.add_task(RecurringTask("daily", "test", 20240515, 18.00, 1.00, 20240615, 1))
+        test_model.add_task(AntiTask("skip", 20240517, 18.00, 1.00))
+        test_model.add_task(TransientTask("lunch", "test", 20240515, 12.00, 1.00))
+        self.assertEqual([task.name for task in transient_tasks], ["lunch"])
+        self.assertEqual([task.name for task in test_model.get_recurring_tasks()], ["daily"])
+        self.assertEqual([task.name for task in test_model.get_anti_tasks()], ["skip"])
+        test_model.delete_task("daily")
+        self.assertEqual(list(test_model.get_anti_tasks()), [])
+
+    def test_transient_against_many_anti_tasks(self):
+        test_model = Model()
+        test_model.add_task(RecurringTask("weekly", "test", 20240101, 18.00, 1.00, 20241231, 7))
+        for week in range(1, 30):
+            test_model.add_task(AntiTask("skip" + str(week), int((datetime(2024, 1, 1) + timedelta(weeks=week)).strftime("%Y%m%d")), 18.00, 1.00))
+        result = test_model.add_task(TransientTask("free slot", "test", 20240318, 18.00, 1.00))
+        self.assertEqual(result, True, 'Adding transient task over a cancelled occurrence failed.')
+        self.assertRaises(ValueError, lambda: test_model.add_task(TransientTask("taken slot", "test", 20240101, 18.50, 1.00)))
+        result = test_model.add_task(TransientTask("other weekday", "test", 20240102, 18.00, 1.00))
+        self.assertEqual(result, True, 'Adding transient task on a different weekday than a weekly task failed.')
+
+    def test_import_validates_batch_atomically(self):
+        test_model = Model()
+        test_model.add_task(TransientTask("existing", "test", 20240516, 9.00, 1.00))
+        schedule = '''[
+            {"Name": "lunch", "Type": "Meal", "Date": 20240517, "StartTime": 12.0, "Duration": 1.0},
+            {"Name": "daily", "Type": "Study", "StartDate": 20240515, "StartTime": 18.0, "Duration": 1.0, "EndDate": 20240615, "Frequency": 1},
+            {"Name": "skip", "Type": "Cancellation", "Date": 20240517, "StartTime": 18.0, "Duration": 1.0},
+            {"Name": "movie", "Type": "Visit", "Date": 20240517, "StartTime": 17.5, "Duration": 2.0}
+        ]'''
+        test_model.import_schedule_from_json(schedule)
+        self.assertEqual(sorted(task.name for task in test_model.tasks), ["daily", "existing", "lunch", "movie"])
+        self.assertEqual(test_model.find_task_by_name("skip"), None)
+        self.assertEqual([task.name for task in test_model.get_anti_tasks()], ["skip"])
+
+        overlapping_batch = '''[
+            {"Name": "first", "Type": "Meal", "Date": 20240520, "StartTime": 12.0, "Duration": 1.0},
+            {"Name": "second", "Type": "Meal", "Date": 20240520, "StartTime": 12.5, "Duration": 1.0}
+        ]'''
+        self.assertRaises(ValueError, lambda: test_model.import_schedule_from_json(overlapping_batch))
+        self.assertEqual(test_model.find_task_by_name("first"), None)
+
+    def test_import_keeps_file_order(self):
+        test_model = Model()
+        schedule = json.dumps([TransientTask("dinner", "test", 20240520, 18.00, 1.00).to_dict(),
+                               TransientTask("breakfast", "test", 20240520, 8.00, 0.50).to_dict(),
+                               TransientTask("lunch", "test", 20240519, 12.00, 1.00).to_dict()])
+        test_model.import_schedule_from_json(schedule)
+        self.assertEqual(test_model.dump_full_schedule_to_json(), json.dumps(json.loads(schedule), indent=2))
+
+    def test_streaming_import_rolls_back_all_batches(self):
+        test_model = Model()
+        schedule = '''[
+            {"Name": "lunch1", "Type": "Meal", "Date": 20240517, "StartTime": 12.0, "Duration": 1.0},
+            {"Name": "lunch2", "Type": "Meal", "Date": 20240518, "StartTime": 12.0, "Duration": 1.0},
+            {"Name": "daily", "Type": "Study", "StartDate": 20240515, "StartTime": 18.0, "Duration": 1.0, "EndDate": 20240615, "Frequency": 1},
+            {"Name": "skip", "Type": "Cancellation", "Date": 20240519, "StartTime": 18.0, "Duration": 1.0},
+            {"Name": "movie", "Type": "Visit", "Date": 20240519, "StartTime": 17.5, "Duration": 2.0}
+        ]'''
+        test_model.import_schedule_from_json_stream(io.StringIO(schedule), batch_size=1)
+        self.assertEqual(sorted(task.name for task in test_model.tasks), ["daily", "lunch1", "lunch2", "movie"])
+
+        clashing_schedule = '''[
+            {"Name": "dinner1", "Type": "Meal", "Date": 20240521, "StartTime": 12.0, "Duration": 1.0},
+            {"Name": "dinner2", "Type": "Meal", "Date": 20240522, "StartTime": 12.0, "Duration": 1.0},
+            {"Name": "late", "Type": "Meal", "Date": 20240523, "StartTime": 18.0, "Duration": 1.0}
+        ]'''
+        self.assertRaises(ValueError, lambda: test_model.import_schedule_from_json_stream(io.StringIO(clashing_schedule), batch_size=1))
+        self.assertEqual(sorted(task.name for task in test_model.tasks), ["daily", "lunch1", "lunch2", "movie"])
+        self.assertEqual(len(test_model.get_events_within_timeframe(20240521, 2)), 2)
+
+    def test_cancelled_import_reports_progress_and_rolls_back(self):
+        test_model = Model()
+        test_model.add_task(TransientTask("breakfast", "test", 20240516, 8.00, 1.00))
+        schedule = json.dumps([TransientTask(f"lunch{i}", "test", 20240517 + i, 12.00, 1.00).to_dict() for i in range(5)])
+        reported = []
+        test_model.import_schedule_from_json_stream(io.StringIO(schedule), batch_size=2, progress=reported.append)
+        self.assertEqual(reported, [0, 2, 4, 5])
+
+        def cancel_after_first_batch(count):
+            if count >= 2:
+                raise KeyboardInterrupt()
+        later_schedule = json.dumps([TransientTask(f"dinner{i}", "test", 20240517 + i, 18.00, 1.00).to_dict() for i in range(5)])
+        self.assertRaises(KeyboardInterrupt, lambda: test_model.import_schedule_from_json_stream(io.StringIO(later_schedule), batch_size=2, progress=cancel_after_first_batch))
+        self.assertEqual(len(test_model.tasks), 6)
+        self.assertEqual(len(test_model.get_events_within_timeframe(20240517, 1)), 1)
+
+    def test_streamed_events_and_schedule_match_lists(self):
+        test_model = Model()
+        test_model.add_task(RecurringTask("late", "test", 20240501, 23.75, 0.50, 20240531, 1))
+        test_model.add_task(TransientTask("lunch", "test", 20240510, 12.00, 1.00))
+        self.assertEqual(len(test_model.get_events_within_timeframe(20240510, 1)), 3)
+        self.assertEqual([(event.task.name, event.start_date) for event in test_model.iter_events_within_timeframe(20240509, 3)],
+                         [(event.task.name, event.start_date) for event in test_model.get_events_within_timeframe(20240509, 3)])
+        buffer = io.StringIO()
+        test_model.write_full_schedule_to_json(buffer)
+        self.assertEqual(buffer.getvalue(), json.dumps([task.to_dict() for task in test_model.tasks], indent=2))
+
+    def test_lazy_events_are_merged_in_order(self):
+        test_model = Model()
+        test_model.add_task(RecurringTask("evening", "test", 20240101, 18.00, 1.00, 20241231, 1))
+        test_model.add_task(RecurringTask("weekly", "test", 20240102, 9.00, 1.00, 20241231, 7))
+        test_model.add_task(TransientTask("lunch", "test", 20240615, 12.00, 1.00))
+        test_model.add_anti_task(AntiTask("skip", 20240616, 18.00, 1.00))
+
+        events = test_model.get_events_within_timeframe(20240610, 14)
+        self.assertEqual(len(events), 13 + 2 + 1)
+        self.assertEqual([(event.start_date, event.start_time) for event in events],
+                         sorted((event.start_date, event.start_time) for event in events))
+
+        first_events = list(islice(test_model.iter_events_within_timeframe(20240610, 14), 3))
+        self.assertEqual([event.task.name for event in first_events], [event.task.name for event in events[:3]])
+        self.assertEqual([event.task.name for event in first_events], ["evening", "weekly", "evening"])
+
+    @unittest.skipUnless(columnar_available(), "numpy is not installed")
+    def test_columnar_events_match_generated_events(self):
+        test_model = Model()
+        test_model.add_task(RecurringTask("evening", "test", 20240101, 23.50, 1.00, 20241231, 1))
+        test_model.add_task(RecurringTask("weekly", "test", 20240102, 9.00, 1.00, 20241231, 7))
+        test_model.add_task(TransientTask("lunch", "test", 20240615, 12, 1))
+        test_model.add_anti_task(AntiTask("skip", 20240616, 23.50, 1.00))
+
+        start_minute = Task("window", "test", 20240610, 0.00, 1.00).start_minute
+        end_minute = start_minute + 14 * 1440 - 15
+        generated = [(minute, event.to_dict()) for minute, event in test_model.iter_timed_events(start_minute, end_minute)]
+        columnar = [(minute, event.to_dict()) for minute, event in test_model.get_columnar_timed_events(start_minute, end_minute)]
+        self.assertEqual(columnar, generated)
+        self.assertEqual(len(test_model.get_event_array(start_minute, end_minute)), 14 + 2 + 1)
+
+    @unittest.skipUnless(columnar_available(), "numpy is not installed")
+    def test_columnar_events_order_shared_start_minutes_like_generated_events(self):
+        test_model = Model()
+        test_model.add_task(RecurringTask("daily", "test", 20240607, 0.50, 1.00, 20240620, 1))
+        # starts earlier but is added later, and the recurring overlap check lets it share 00:30 on 20240610 and 20240617 with daily
+        test_model.add_task(RecurringTask("weekly", "test", 20240603, 0.50, 1.00, 20240628, 7))
+
+        start_minute = Task("window", "test", 20240609, 0.00, 1.00).start_minute
+        end_minute = start_minute + 14 * 1440 - 15
+        generated = [(minute, event.task.name) for minute, event in test_model.iter_timed_events(start_minute, end_minute)]
+        columnar = [(minute, event.task.name) for minute, event in test_model.get_columnar_timed_events(start_minute, end_minute)]
+        self.assertEqual(columnar, generated)
+        self.assertEqual([name for _, name in generated[1:3]], ["weekly", "daily"])
+
+    def test_validate_schedule_reports_every_conflict(self):
+        test_model = Model()
+        schedule = '''[
+            {"Name": "daily", "Type": "Study", "StartDate": 20240515, "StartTime": 18.0, "Duration": 1.0, "EndDate": 20240615, "Frequency": 1},
+            {"Name": "skip", "Type": "Cancellation", "Date": 20240517, "StartTime": 18.0, "Duration": 1.0},
+            {"Name": "movie", "Type": "Visit", "Date": 20240517, "StartTime": 17.5, "Duration": 2.0},
+            {"Name": "dinner", "Type": "Meal", "Date": 20240518, "StartTime": 18.5, "Duration": 1.0},
+            {"Name": "lunch", "Type": "Meal", "Date": 20240520, "StartTime": 12.0, "Duration": 1.0},
+            {"Name": "meeting", "Type": "Visit", "Date": 20240520, "StartTime": 12.5, "Duration": 1.0}
+        ]'''
+        conflicts = test_model.validate_schedule_json(schedule)
+        self.assertEqual(sorted((first.name, second.name) for first, second in conflicts), [("daily", "dinner"), ("lunch", "meeting")])
+        self.assertEqual(len(test_model.tasks), 0)
+
+        test_model.add_task(RecurringTask("daily", "test", 20240515, 18.00, 1.00, 20240615, 1))
+        test_model.add_task(TransientTask("lunch", "test", 20240520, 12.00, 1.00))
+        self.assertEqual(test_model.validate_schedule(), [])
+
+    def test_validate_schedule_compares_recurring_occurrences_exactly(self):
+        test_model = Model()
+        daily = RecurringTask("daily", "test", 20240607, 0.50, 1.00, 20240620, 1)
+        weekly = RecurringTask("weekly", "test", 20240603, 0.50, 1.00, 20240628, 7)
+        # add_task's check misses that these share 00:30 on 20240610 and 20240617
+        self.assertEqual(test_model.validate_schedule([daily, weekly]), [(daily, weekly)])
+        first_skip = AntiTask("first skip", 20240610, 0.50, 1.00)
+        self.assertEqual(test_model.validate_schedule([daily, weekly, first_skip]), [(daily, weekly)])
+        second_skip = AntiTask("second skip", 20240617, 0.50, 1.00)
+        self.assertEqual(test_model.validate_schedule([daily, weekly, first_skip, second_skip]), [])
+
+        monday = RecurringTask("monday", "test", 20240603, 10.00, 1.00, 20240630, 7)
+        tuesday = RecurringTask("tuesday", "test", 20240604, 10.00, 1.00, 20240630, 7)
+        stray = AntiTask("stray", 20240605, 10.00, 1.00)
+        self.assertEqual(test_model.validate_schedule([monday, tuesday, stray]), [(stray, None)])
+
+    def test_failed_edit_leaves_model_unchanged(self):
+        test_model = Model()
+        test_model.add_task(RecurringTask("daily", "test", 20240501, 18.00, 1.00, 20240531, 1))
+        test_model.add_task(TransientTask("lunch", "test", 20240510, 12.00, 1.00))
+        test_model.add_task(TransientTask("dinner", "test", 20240511, 20.00, 1.00))
+        test_model.add_anti_task(AntiTask("skip", 20240512, 18.00, 1.00))
+
+        edited = RecurringTask("daily", "test", 20240501, 19.50, 1.00, 20240531, 1)
+        self.assertRaises(ValueError, lambda: test_model.edit_task("daily", edited))
+        self.assertEqual(edited.anti_tasks, [])
+        self.assertEqual([task.name for task in test_model.tasks], ["daily", "lunch", "dinner"])
+        self.assertIs(test_model.anti_tasks["skip"].task_reference, test_model.find_task_by_name("daily"))
+
+        self.assertTrue(test_model.edit_task("daily", RecurringTask("daily", "test", 20240501, 18.00, 1.00, 20240520, 1)))
+        self.assertEqual(test_model.find_task_by_name("daily").end_date, 20240520)
+        self.assertIs(test_model.anti_tasks["skip"].task_reference, test_model.find_task_by_name("daily"))
+        self.assertTrue(test_model.edit_task("lunch", TransientTask("lunch", "test", 20240510, 11.00, 1.50)))
+        self.assertEqual(len(test_model.get_events_within_timeframe(20240510, 1)), 2)
+
+    def test_batch_defers_checks_and_rolls_back(self):
+        test_model = Model()
+        test_model.add_task(RecurringTask("first", "test", 20240902, 9.00, 1.00, 20241220, 7))
+        test_model.add_task(RecurringTask("second", "test", 20240902, 10.00, 1.00, 20241220, 7))
+        test_model.add_anti_task(AntiTask("holiday", 20240909, 9.00, 1.00))
+
+        # swapping two tasks passes through an overlapping state, which is only allowed inside a batch
+        self.assertRaises(ValueError, lambda: test_model.edit_task("first", RecurringTask("first", "test", 20240902, 10.00, 1.00, 20241220, 7)))
+        with test_model.batch():
+            test_model.edit_task("first", RecurringTask("first", "test", 20240902, 10.00, 1.00, 20241220, 7))
+            test_model.edit_task("second", RecurringTask("second", "test", 20240902, 9.00, 1.00, 20241220, 7))
+        self.assertEqual(test_model.find_task_by_name("first").start_time, 10.00)
+        self.assertEqual(test_model.find_task_by_name("second").start_time, 9.00)
+        self.assertEqual(list(test_model.anti_tasks), [])
+
+        events_before = [(event.task.name, event.start_date, event.start_time) for event in test_model.get_events_for_day(20240916)]
+        def failing_batch():
+            with test_model.batch():
+                test_model.delete_task("second")
+                test_model.add_task(TransientTask("meeting", "test", 20240916, 10.50, 1.00))
+                test_model.add_task(RecurringTask("third", "test", 20240903, 9.00, 1.00, 20241220, 7))
+        self.assertRaises(ValueError, failing_batch)
+        self.assertEqual(sorted(task.name for task in test_model.tasks), ["first", "second"])
+        self.assertEqual([(event.task.name, event.start_date, event.start_time) for event in test_model.get_events_for_day(20240916)], events_before)
+
+    def test_failed_batch_keeps_task_order(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database = os.path.join(directory.name, "schedule.db")
+
+        for test_model in [Model(), Model(database)]:
+            self.addCleanup(test_model.close)
+            test_model.add_task(RecurringTask("first", "test", 20240902, 9.00, 1.00, 20241220, 7))
+            test_model.add_task(RecurringTask("second", "test", 20240902, 10.00, 1.00, 20241220, 7))
+            test_model.add_task(RecurringTask("third", "test", 20240902, 11.00, 1.00, 20241220, 7))
+            test_model.add_anti_task(AntiTask("holiday", 20240909, 10.00, 1.00))
+            test_model.add_anti_task(AntiTask("break", 20240916, 9.00, 1.00))
+            test_model.add_task(TransientTask("lunch", "test", 20240903, 12.00, 1.00))
+            test_model.add_task(TransientTask("dinner", "test", 20240903, 18.00, 1.00))
+            schedule_before = test_model.dump_full_schedule_to_json()
+
+            def failing_batch():
+                with test_model.batch():
+                    test_model.delete_task("second")
+                    test_model.delete_task("lunch")
+                    test_model.delete_task("break")
+                    test_model.edit_task("first", RecurringTask("first", "test", 20240902, 8.00, 1.00, 20241220, 7))
+                    test_model.add_task(TransientTask("meeting", "test", 20240902, 11.50, 1.00))
+            self.assertRaises(ValueError, failing_batch)
+            self.assertEqual(test_model.dump_full_schedule_to_json(), schedule_before)
+            self.assertEqual(list(test_model.anti_tasks), ["holiday", "break"])
+
+        # the database keeps the order too
+        test_model.close()
+        reopened_model = Model(database)
+        self.addCleanup(reopened_model.close)
+        self.assertEqual(reopened_model.dump_full_schedule_to_json(), schedule_before)
+        self.assertEqual(list(reopened_model.anti_tasks), ["holiday", "break"])
+
+    def test_free_slots_skip_busy_time(self):
+        test_model = Model()
+        test_model.add_task(RecurringTask("sleep", "test", 20240601, 22.00, 9.00, 20240630, 1))
+        test_model.add_task(TransientTask("lunch", "test", 20240610, 12.00, 1.00))
+        test_model.add_task(TransientTask("errand", "test", 20240610, 13.50, 0.50))
+        test_model.add_anti_task(AntiTask("late", 20240611, 22.00, 9.00))
+
+        self.assertEqual(test_model.find_free_slots(1.00, 20240610, 1, limit=2), [(20240610, 7.00), (20240610, 7.25)])
+        free_slots = test_model.find_free_slots(1.00, 20240610, 2)
+        self.assertIn((20240610, 11.00), free_slots)
+        self.assertNotIn((20240610, 11.25), free_slots)
+        self.assertNotIn((20240610, 12.75), free_slots)
+        self.assertIn((20240611, 23.75), free_slots)
+        self.assertEqual(len(free_slots), 46 + 68)
+        self.assertRaises(ValueError, lambda: test_model.find_free_slots(0.10, 20240610, 1))
+
+    def test_import_keeps_occupancy_of_shared_slots(self):
+        # the recurring overlap check lets these two share 01:00 to 01:45 every morning
+        schedule = json.dumps([RecurringTask("late", "test", 20240602, 21.75, 4.00, 20240630, 1).to_dict(),
+                               AntiTask("skip", 20240605, 21.75, 4.00).to_dict(),
+                               RecurringTask("early", "test", 20240602, 1.00, 4.25, 20240630, 1).to_dict()])
+        test_model = Model()
+        test_model.import_schedule_from_json(schedule)
+
+        rebuilt_model = Model()
+        rebuilt_model.import_schedule_from_json(schedule)
+        rebuilt_model.occupancy_stale = True
+        self.assertEqual(test_model.get_occupancy().days, rebuilt_model.get_occupancy().days)
+        self.assertEqual(test_model.get_occupancy().extra_counts, rebuilt_model.get_occupancy().extra_counts)
+        self.assertRaises(ValueError, lambda: test_model.add_task(TransientTask("probe", "test", 20240606, 1.00, 0.25)))
+
+    def test_occupancy_tracks_busy_days(self):
+        test_model = Model()
+        test_model.add_task(RecurringTask("night", "test", 20240701, 22.00, 2.00, 20240731, 7))
+        test_model.add_task(TransientTask("trip", "test", 20240703, 23.00, 2.00))
+        self.assertTrue(test_model.is_day_busy(20240701))
+        self.assertTrue(test_model.is_day_busy(20240702))  # the occurrence ends exactly at midnight
+        self.assertFalse(test_model.is_day_busy(20240705))
+        self.assertTrue(test_model.is_day_busy(20240704))
+
+        test_model.add_anti_task(AntiTask("skip", 20240708, 22.00, 2.00))
+        self.assertFalse(test_model.is_day_busy(20240708))
+        self.assertTrue(test_model.add_task(TransientTask("party", "test", 20240708, 23.00, 0.50)))
+        self.assertRaises(ValueError, lambda: test_model.add_task(TransientTask("late", "test", 20240715, 23.75, 0.25)))
+
+        test_model.delete_task("party")
+        test_model.delete_task("skip")
+        self.assertTrue(test_model.is_day_busy(20240708))
+        for date in range(20240701, 20240732):
+            self.assertEqual(test_model.is_day_busy(date), len(test_model.get_events_for_day(date)) > 0)
+
+    def test_database_backed_model_reopens_schedule(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database = os.path.join(directory.name, "schedule.db")
+
+        test_model = Model(database)
+        test_model.add_task(RecurringTask("class", "test", 20240801, 9.00, 1.50, 20240831, 7))
+        test_model.add_task(TransientTask("dentist", "test", 20240802, 9.00, 1.00))
+        test_model.add_anti_task(AntiTask("holiday", 20240808, 9.00, 1.50))
+        test_model.add_task(TransientTask("brunch", "test", 20240808, 9.50, 1.00))
+        self.assertRaises(ValueError, lambda: test_model.add_task(TransientTask("clash", "test", 20240802, 9.50, 1.00)))
+        events_before = [(event.task.name, event.start_date, event.start_time) for event in test_model.get_events_within_timeframe(20240801, 31)]
+        test_model.close()
+
+        reopened_model = Model(database)
+        self.addCleanup(reopened_model.close)
+        self.assertEqual([task.name for task in reopened_model.tasks], ["class", "dentist", "brunch"])
+        self.assertEqual(reopened_model.find_task_by_name("holiday"), None)
+        self.assertIs(reopened_model.find_task_by_name("dentist"), reopened_model.find_task_by_name("dentist"))
+        self.assertEqual([(event.task.name, event.start_date, event.start_time) for event in reopened_model.get_events_within_timeframe(20240801, 31)], events_before)
+        self.assertRaises(ValueError, lambda: reopened_model.delete_task("holiday"))  # brunch is in the cancelled slot
+        self.assertRaises(ValueError, lambda: reopened_model.add_task(TransientTask("clash", "test", 20240815, 10.00, 1.00)))
+        self.assertTrue(reopened_model.is_day_busy(20240802))
+
+    def test_snapshot_restores_model_without_revalidating(self):
+        test_model = Model()
+        test_model.add_task(RecurringTask("standup", "test", 20240901, 9.00, 0.25, 20240930, 1))
+        test_model.add_anti_task(AntiTask("day off", 20240905, 9.00, 0.25))
+        test_model.add_task(TransientTask("review", "test", 20240905, 9.00, 2.00))
+        test_model.add_task(TransientTask("café", "test", 20240906, 13.50, 0.75))
+        buffer = io.BytesIO()
+        test_model.write_snapshot(buffer)
+
+        restored_model = Model()
+        restored_model.load_snapshot(io.BytesIO(buffer.getvalue()))
+        self.assertEqual(restored_model.dump_full_schedule_to_json(), test_model.dump_full_schedule_to_json())
+        self.assertIs(restored_model.find_task_by_name("standup").anti_tasks[0], next(iter(restored_model.get_anti_tasks())))
+        self.assertEqual([(event.task.name, event.start_date, event.start_time) for event in restored_model.get_events_within_timeframe(20240904, 3)],
+                         [(event.task.name, event.start_date, event.start_time) for event in test_model.get_events_within_timeframe(20240904, 3)])
+        self.assertRaises(ValueError, lambda: restored_model.add_task(TransientTask("clash", "test", 20240906, 14.00, 1.00)))
+        self.assertRaises(ValueError, lambda: restored_model.load_snapshot(io.BytesIO(buffer.getvalue())))
+        self.assertRaises(ValueError, lambda: Model().load_snapshot(io.BytesIO(buffer.getvalue()[:-4])))
+
+    def test_snapshot_and_database_keep_ints_and_floats(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database = os.path.join(directory.name, "schedule.db")
+
+        test_model = Model(database)
+        test_model.add_task(RecurringTask("gym", "test", 20241101, 17, 1, 20241130, 1))
+        test_model.add_anti_task(AntiTask("sick", 20241105, 17, 1.0))
+        test_model.add_task(TransientTask("call", "test", 20241102, 9.0, 2))
+        test_model.add_task(TransientTask("nap", "test", 20241102, 13, 0.5))
+        expected = json.dumps([task.to_dict() for task in [*test_model.tasks, *test_model.get_anti_tasks()]])
+        buffer = io.BytesIO()
+        test_model.write_snapshot(buffer)
+        test_model.close()
+
+        restored_model = Model()
+        restored_model.load_snapshot(io.BytesIO(buffer.getvalue()))
+        self.assertEqual(json.dumps([task.to_dict() for task in [*restored_model.tasks, *restored_model.get_anti_tasks()]]), expected)
+
+        reopened_model = Model(database)
+        self.addCleanup(reopened_model.close)
+        self.assertEqual(json.dumps([task.to_dict() for task in [*reopened_model.tasks, *reopened_model.get_anti_tasks()]]), expected)
+
+    def test_change_log_replays_changes_after_compaction(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "schedule")
+
+        test_model = Model()
+        test_model.open_change_log(path)
+        test_model.add_task(RecurringTask("walk", "test", 20241001, 7.00, 0.50, 20241031, 1))
+        test_model.add_task(TransientTask("vet", "test", 20241002, 10.00, 1.00))
+        test_model.change_log.compact(test_model.write_snapshot)
+        test_model.add_anti_task(AntiTask("rain", 20241003, 7.00, 0.50))
+        test_model.edit_task("vet", TransientTask("vet", "test", 20241002, 11.00, 1.00))
+        def failing_batch():
+            with test_model.batch():
+                test_model.delete_task("vet")
+                test_model.add_task(TransientTask("clash", "test", 20241004, 7.00, 1.00))
+        self.assertRaises(ValueError, failing_batch)
+        test_model.close()
+        self.assertEqual(sorted(os.listdir(directory.name)), ["schedule.1.log", "schedule.1.snapshot"])
+
+        reopened_model = Model()
+        reopened_model.open_change_log(path)
+        self.addCleanup(reopened_model.close)
+        self.assertEqual(reopened_model.dump_full_schedule_to_json(), test_model.dump_full_schedule_to_json())
+        self.assertEqual(sorted(task.name for task in reopened_model.get_anti_tasks()), ["rain"])
+
+    def test_mapped_schedule_answers_window_queries(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        file_name = os.path.join(directory.name, "schedule.pssm")
+
+        test_model = Model()
+        test_model.add_task(RecurringTask("shift", "work", 20241101, 22.00, 4.00, 20241130, 7))
+        test_model.add_anti_task(AntiTask("swap", 20241108, 22.00, 4.00))
+        for day in range(1, 31):
+            test_model.add_task(TransientTask(f"lunch {day}", "meal", 20241100 + day, 12.00, 0.75))
+        test_model.add_task(TransientTask("late film", "fun", 20241108, 23.00, 2.00))
+        test_model.add_task(TransientTask("nap", "rest", 20241102, 14, 1))
+        with open(file_name, "wb") as file:
+            test_model.write_mapped_schedule(file)
+
+        mapped_model = MappedModel(file_name)
+        self.addCleanup(mapped_model.close)
+        for start_date, days in [(20241101, 1), (20241108, 2), (20241109, 1), (20241115, 7), (20241201, 3)]:
+            self.assertEqual([(event.task.name, event.start_date, event.start_time) for event in mapped_model.get_events_within_timeframe(start_date, days)],
+                             [(event.task.name, event.start_date, event.start_time) for event in test_model.get_events_within_timeframe(start_date, days)])
+        self.assertEqual(mapped_model.find_task_by_name("lunch 12").to_dict(), test_model.find_task_by_name("lunch 12").to_dict())
+        self.assertEqual(json.dumps(mapped_model.find_task_by_name("nap").to_dict()), json.dumps(test_model.find_task_by_name("nap").to_dict()))
+        self.assertEqual(len(mapped_model.tasks), 33)
+        self.assertRaises(ValueError, lambda: mapped_model.add_task(TransientTask("extra", "test", 20241102, 8.00, 1.00)))
+        self.assertRaises(ValueError, lambda: mapped_model.delete_task("lunch 1"))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
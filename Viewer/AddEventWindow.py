@@ -52,6 +52,7 @@ class AddEventWindow(QDialog):
         self.delete_button = QPushButton("Delete")
         self.save_button = QPushButton("Save")
         self.anti_task_button = QPushButton("Anti-Task")  # New button
+        self.suggest_time_button = QPushButton("Suggest Time")
 
         self.recurring_checkbox.stateChanged.connect(self.toggle_weekly_box)
         self.add_button.clicked.connect(self.add_or_save_event)
@@ -59,6 +60,7 @@ class AddEventWindow(QDialog):
         self.delete_button.clicked.connect(self.delete_event)
         self.save_button.clicked.connect(self.add_or_save_event)
         self.anti_task_button.clicked.connect(self.anti_task)
+        self.suggest_time_button.clicked.connect(self.suggest_time)
 
     def is_valid_time(self, time_str):
         try:
@@ -78,6 +80,7 @@ class AddEventWindow(QDialog):
         layout.addWidget(QLabel("End Time (H:MM):"))
         layout.addWidget(self.end_time_edit)
         layout.addWidget(self.end_am_pm)
+        layout.addWidget(self.suggest_time_button)
         layout.addWidget(QLabel("Description:"))
         layout.addWidget(self.description_edit)
         layout.addWidget(QLabel("Color:"))
@@ -111,6 +114,31 @@ class AddEventWindow(QDialog):
         # This method is called when the "Anti-Task" button is clicked
         print("Anti-Task button clicked")
 
+    # fills in the earliest free start and end time on the beginning date, keeping the entered duration (one hour if none is entered)
+    def suggest_time(self):
+        start_time = self.start_time_edit.text() + " " + self.start_am_pm.currentText()
+        end_time = self.end_time_edit.text() + " " + self.end_am_pm.currentText()
+        duration = 1.0
+        if self.is_valid_time(start_time) and self.is_valid_time(end_time):
+            start = datetime.strptime(start_time, "%I:%M %p")
+            end = datetime.strptime(end_time, "%I:%M %p")
+            minutes = (end - start).seconds // 60
+            if minutes >= 15:
+                duration = (minutes // 15) / 4
+
+        date = self.beginning_date_edit.date()
+        date_int = date.year() * 10000 + date.month() * 100 + date.day()
+        slots = self.viewer.controller.find_free_slots(duration, date_int, 1, limit=1)
+        if not slots:
+            QMessageBox.warning(self, "Error", "No free time on this date.")
+            return
+
+        _, slot_start = slots[0]
+        for time, time_edit, am_pm in ((slot_start, self.start_time_edit, self.start_am_pm), ((slot_start + duration) % 24, self.end_time_edit, self.end_am_pm)):
+            hours = int(time)
+            time_edit.setText('{}:{:02d}'.format((hours % 12) or 12, int((time - hours) * 60)))
+            am_pm.setCurrentText("AM" if hours < 12 else "PM")
+
     def toggle_weekly_box(self, state):
         if state == Qt.Checked:
             for checkbox in self.days_checkboxes:
@@ -15,6 +15,7 @@ class MonthViewWidget(QCalendarWidget):
             navigationBarVisible=True,
             dateEditEnabled=True)       
         self.controller = controller
+        self.busy_days = {}  # integer date -> whether it was busy when it was last painted
         self.setEnabled(True)
         self.setGeometry(QtCore.QRect(0, 0, 320, 250))
         self.clicked.connect(print)
@@ -77,9 +78,14 @@ class MonthViewWidget(QCalendarWidget):
         d_end = QtCore.QDate(self.yearShown(), self.monthShown(), d_start.daysInMonth())
         if d_start <= date <= d_end:
             #super(MonthViewWidget, self).paintCell(painter, rect, date)
+            # a single lookup in the Model's occupancy bitmaps, no events are expanded.
+            # while a background operation uses the model the day is painted as it was last read
             date_int = date.year() * 10000 + date.month() * 100 + date.day()
-            events = self.controller.get_events_within_timeframe(date_int, 1) # get all events on this day
-            if len(events) > 0:
+            if self.controller.operation_running:
+                busy = self.busy_days.get(date_int, False)
+            else:
+                busy = self.busy_days[date_int] = self.controller.is_day_busy(date_int)
+            if busy:
                 painter.fillRect(rect, Qt.yellow)
             painter.drawText(rect, Qt.AlignCenter, str(date.day()))
 
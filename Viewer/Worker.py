@@ -0,0 +1,112 @@
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt5.QtWidgets import QMessageBox, QProgressDialog, QWidget
+
+from Controller.Controller import OperationCancelled
+
+
+# signals of a ControllerWorker. they are emitted on the worker thread and delivered to the connected views on the GUI thread
+class WorkerSignals(QObject):
+    progress = pyqtSignal(int)      # number of items processed so far
+    finished = pyqtSignal(object)   # result of the operation
+    failed = pyqtSignal(str)        # error message
+    cancelled = pyqtSignal()
+
+
+# runs one Controller operation on a QThreadPool thread, so the window keeps repainting while it works.
+# function is called with a progress callback, which the operation should pass on to the Controller.
+# read_only operations change nothing, so one that finishes after cancel() was called is reported as cancelled
+class ControllerWorker(QRunnable):
+    def __init__(self, function, read_only: bool = False):
+        super().__init__()
+        self.function = function
+        self.read_only = read_only
+        self.signals = WorkerSignals()
+        self.cancel_requested = threading.Event()
+
+    # asks the operation to stop. it stops at its next progress report
+    def cancel(self):
+        self.cancel_requested.set()
+
+    # progress callback handed to the operation. raises OperationCancelled once cancel() was called
+    def report_progress(self, count: int):
+        if self.cancel_requested.is_set():
+            raise OperationCancelled()
+        self.signals.progress.emit(count)
+
+    def run(self):
+        try:
+            result = self.function(self.report_progress)
+        except OperationCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+
+        # an operation that changes something and finished anyway after cancel() was called is still reported, its changes were made
+        if self.read_only and self.cancel_requested.is_set():
+            self.signals.cancelled.emit()
+        else:
+            self.signals.finished.emit(result)
+
+
+# disables the controls of the window the widget is in and returns the ones it disabled. windows opened from it,
+# such as the progress dialog, are left enabled
+def disable_window_controls(widget) -> list:
+    disabled = []
+    for child in widget.window().findChildren(QWidget, options=Qt.FindDirectChildrenOnly):
+        if not child.isWindow() and child.isEnabled():
+            child.setEnabled(False)
+            disabled.append(child)
+    return disabled
+
+
+# runs a Controller operation in the background behind a progress dialog with a Cancel button.
+# the model is not locked, so nothing else may use it until the operation is done. the dialog only blocks input once it is shown,
+# so the controls of the parent's window are disabled until then, and controller.operation_running is set so the views
+# paint from what they last read instead of reading the model.
+# on_finished is called on the GUI thread with the result. errors are shown in a message box, worded by describe_error if it is given.
+# read_only is passed on to the ControllerWorker
+def run_in_background(parent, controller, label: str, function, on_finished=None, describe_error=None, read_only: bool = False):
+    progress_dialog = QProgressDialog(label, "Cancel", 0, 0, parent)
+    progress_dialog.setWindowModality(Qt.WindowModal)
+    progress_dialog.setMinimumDuration(500)  # operations that finish quickly never show the dialog
+    progress_dialog.setAutoClose(False)
+    progress_dialog.setAutoReset(False)
+
+    worker = ControllerWorker(function, read_only)
+    progress_dialog.worker = worker  # keeps the worker and its signals alive until the dialog is gone
+    progress_dialog.canceled.connect(worker.cancel)
+
+    disabled_controls = disable_window_controls(parent)
+    controller.operation_running = True
+
+    # called on the GUI thread once the worker is done, before the result is handled
+    def end_operation():
+        progress_dialog.close()
+        controller.operation_running = False
+        for control in disabled_controls:
+            control.setEnabled(True)
+        parent.window().update()  # repaints the views that painted from their last known state
+
+    def show_progress(count):
+        progress_dialog.setLabelText(f"{label} ({count} done)")
+
+    def finish(result):
+        end_operation()
+        if on_finished is not None:
+            on_finished(result)
+
+    def fail(message):
+        end_operation()
+        QMessageBox.warning(parent, "Error", describe_error(message) if describe_error is not None else message)
+
+    worker.signals.progress.connect(show_progress)
+    worker.signals.finished.connect(finish)
+    worker.signals.failed.connect(fail)
+    worker.signals.cancelled.connect(end_operation)
+
+    QThreadPool.globalInstance().start(worker)
+    return worker
@@ -14,6 +14,7 @@ from Controller import Controller
 from Task import Task, AntiTask, RecurringTask, TransientTask
 
 from .MonthView import MonthViewWidget
+from .Worker import run_in_background
 
 class Viewer(QWidget):
     def __init__(self, controller: Controller):
@@ -126,6 +127,8 @@ class Viewer(QWidget):
         add_event_window.exec_()
 
     def search_task(self):
+        if self.controller.operation_running:
+            return
         task_name = self.search_input.text()
         if not task_name:
             QMessageBox.warning(self, "Error", "Please enter a task name to search.")
@@ -162,19 +165,18 @@ class Viewer(QWidget):
     def export_schedule(self):
         file_name, _ = QFileDialog.getSaveFileName(self, "Save Schedule", "", "Text Files (*.txt)")
         if file_name:
-            try:
-                self.controller.export_schedule_to_json_file(file_name)
-            except:
-                QMessageBox.warning(self, "Error", f"Failed to write to {file_name}.")
+            run_in_background(self, self.controller, "Exporting schedule...",
+                              lambda progress: self.controller.export_schedule_to_json_file(file_name, progress),
+                              describe_error=lambda _: f"Failed to write to {file_name}.")
 
     def load_schedule(self):
         file_name, _ = QFileDialog.getOpenFileName(self, "Load Schedule", "", "JSON Files (*.json)")
         if file_name: 
-            try:
-                self.controller.import_schedule_from_json_file(file_name)
-                self.refresh_views()
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f'Failed to load schedule: {str(e)}')
+            # streamed in small batches so the import reports progress often and can be cancelled between batches
+            run_in_background(self, self.controller, "Loading schedule...",
+                              lambda progress: self.controller.import_schedule_from_json_file(file_name, stream=True, progress=progress, batch_size=1000),
+                              lambda _: self.refresh_views(),
+                              describe_error=lambda message: f'Failed to load schedule: {message}')
 
     def write_schedule_dialog(self):
         dialog = WriteScheduleDialog(self, self.controller)
@@ -263,6 +265,10 @@ class MonthViewWidget(QWidget):
         self.month_combo.setCurrentIndex(month_num%12)
         
     def update_month_view(self):
+        # the days keep showing what was last read while a background operation uses the model, it is refreshed when it is done
+        if self.controller.operation_running:
+            return
+
         # Clear the current calendar view
         for i in reversed(range(self.calendar_layout.count())): 
             widget = self.calendar_layout.itemAt(i).widget()
@@ -275,21 +281,26 @@ class MonthViewWidget(QWidget):
         start_day_of_week = first_day.dayOfWeek()
         days_in_month = first_day.daysInMonth()
 
+        # get the events of every day in the month in one pass
+        events_by_day = self.controller.get_events_by_day(year * 10000 + month * 100 + 1, days_in_month)
+
         # Fill the calendar grid with days
         day = 1
         for i in range(start_day_of_week - 1, start_day_of_week - 1 + days_in_month):
             date = QDate(year, month, day)
             day_button = QPushButton(str(day))
             day_button.setMinimumHeight(60)
-            if len(self.controller.get_events_within_timeframe(date.year() * 10000 + date.month() * 100 + date.day(), 1)) > 0:
+            if len(events_by_day[date.year() * 10000 + date.month() * 100 + date.day()]) > 0:
                 day_button.setStyleSheet("background-color: #ffff78")
             day_button.clicked.connect(lambda checked, date=date: self.view_tasks_for_date(date))
             self.calendar_layout.addWidget(day_button, i // 7, i % 7)
             day += 1
 
     def view_tasks_for_date(self, date):
+        if self.controller.operation_running:
+            return
         date_int = date.year() * 10000 + date.month() * 100 + date.day()
-        task_list = self.controller.get_events_within_timeframe(date_int, 1)
+        task_list = self.controller.get_events_for_day(date_int)
         if task_list:
             dialog = ScheduleDialog(self)
             dialog.set_schedule(task_list)
@@ -354,9 +365,9 @@ class WriteScheduleDialog(QDialog):
         date_int = date.year() * 10000 + date.month() * 100 + date.day()
         schedule_type = self.schedule_type_combo.currentText()
 
-        self.controller.write_schedule(file_name, date_int, schedule_type)
-        
-        self.accept()
+        run_in_background(self, self.controller, "Writing schedule...",
+                          lambda progress: self.controller.write_schedule(file_name, date_int, schedule_type, progress),
+                          lambda _: self.accept())
 
 def decimal_to_12hr(time_decimal):
     hours = int(time_decimal)
@@ -422,7 +433,23 @@ class ViewScheduleDialog(QDialog):
         else:
             timeframe = 1  # Default to day if the schedule type is not recognized
 
-        task_list = self.controller.get_events_within_timeframe(date_int, timeframe)
+        run_in_background(self, self.controller, "Finding events...",
+                          lambda progress: self.controller.get_events_by_day(date_int, timeframe, progress),
+                          self.show_schedule, read_only=True)
+
+    # called on the GUI thread with the events found by view_schedule
+    def show_schedule(self, events_by_day):
+        # flatten the per-day buckets back into one chronological list, listing events that cross midnight only once.
+        # days served from the event cache were expanded separately, so an event crossing midnight can be a different Event object
+        # in each day's list. its task and start identify it instead
+        task_list = []
+        listed_events = set()
+        for events in events_by_day.values():
+            for event in events:
+                event_key = (id(event.task), event.start_date, event.start_time)
+                if event_key not in listed_events:
+                    listed_events.add(event_key)
+                    task_list.append(event)
         if task_list:
             dialog = ScheduleDialog(self)
             dialog.set_schedule(task_list)
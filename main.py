@@ -1,10 +1,12 @@
 from PyQt5.QtWidgets import QApplication
 from Viewer import Viewer
 from Controller import Controller
+import sys
 
 if __name__ == '__main__':
     app = QApplication([])
-    controller = Controller()
+    # a schedule database file can be given on the command line, otherwise the schedule is kept in memory
+    controller = Controller(sys.argv[1] if len(sys.argv) > 1 else None)
     viewer = Viewer(controller)
     viewer.show()
     app.exec_()